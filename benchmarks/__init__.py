@@ -0,0 +1,18 @@
+"""Offline micro-benchmarks for the Reverb bot's hot paths.
+
+Run from the repository root::
+
+    python -m benchmarks                    # all benchmarks at the default sizes
+    python -m benchmarks storage.sqlite     # only keys containing a pattern
+    python -m benchmarks --full             # also 1M messages / 20k channels
+    python -m benchmarks --update-baseline  # record results in baseline.json
+
+Workloads use synthetic data in temporary directories and never touch
+``data/`` or Discord. Results are compared with ``baseline.json`` and runs
+slower than the baseline by more than the tolerance are reported as
+regressions, with a non-zero exit status. Baselines depend on the machine,
+so record them on the machine that is used for comparison.
+
+``python -m benchmarks.load`` is a separate end-to-end load test of the
+send paths against a local fake of Discord's REST API, see ``load.py``.
+"""
@@ -0,0 +1,91 @@
+"""Command line entry point: ``python -m benchmarks``."""
+
+import argparse
+import json
+import os
+import sys
+import tempfile
+from pathlib import Path
+
+from .harness import (
+    BASELINE_FILE,
+    DEFAULT_REPEAT,
+    DEFAULT_TOLERANCE,
+    DEFAULT_WARMUP,
+    compare,
+    environment,
+    format_seconds,
+    load_baseline,
+    measure,
+    report,
+    save_baseline,
+    select
+)
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+
+
+def parse_args(argv=None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(prog="python -m benchmarks", description="Run the offline benchmarks.")
+    parser.add_argument("patterns", nargs="*", help="Only run benchmarks whose key contains one of these globs")
+    parser.add_argument("--full", action="store_true", help="Also run the largest, slow sizes")
+    parser.add_argument("--repeat", type=int, default=DEFAULT_REPEAT,
+                        help="Minimum timed runs per benchmark; the median is reported")
+    parser.add_argument("--warmup", type=int, default=DEFAULT_WARMUP, help="Untimed runs before the timed ones")
+    parser.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE,
+                        help="Allowed slowdown of the median against the baseline before flagging a "
+                             "regression; widened to the runs' combined spread")
+    parser.add_argument("--baseline", type=Path, default=BASELINE_FILE, help="Baseline file to compare with")
+    parser.add_argument("--update-baseline", action="store_true", help="Write the results to the baseline file")
+    parser.add_argument("--output", type=Path, help="Also write this run's results as JSON")
+    parser.add_argument("--list", action="store_true", help="List the selected benchmarks and exit")
+    return parser.parse_args(argv)
+
+
+def main(argv=None) -> int:
+    args = parse_args(argv)
+    baseline_path = args.baseline.resolve()
+    output_path = args.output.resolve() if args.output else None
+
+    # The bot creates logs/ and data/ in the working directory on import
+    sys.path.insert(0, str(REPO_ROOT))
+    workdir = tempfile.TemporaryDirectory(prefix="reverb-bench-cwd-")
+    os.chdir(workdir.name)
+    from . import scheduler, search, storage  # noqa: F401  (registers the benchmarks)
+
+    selected = select(args.patterns, args.full)
+    if args.list:
+        for bench, size in selected:
+            report(bench.key(size))
+        return 0
+
+    baseline = load_baseline(baseline_path)["results"]
+    results = {}
+    regressions = []
+    for bench, size in selected:
+        key = bench.key(size)
+        result = measure(bench, size, args.repeat, args.warmup)
+        results[key] = result
+        status, ratio = compare(result, baseline.get(key), args.tolerance)
+        change = f"{ratio:5.2f}x baseline" if ratio is not None else ""
+        report(f"{key:<40} {format_seconds(result['median_seconds_per_op']):>10}/op  {status:<10} {change}")
+        if status == "REGRESSION":
+            regressions.append(key)
+
+    if output_path is not None:
+        output_path.write_text(json.dumps({"environment": environment(), "results": results}, indent=2) + "\n")
+    if args.update_baseline:
+        save_baseline(results, baseline_path)
+        report(f"Updated {baseline_path} with {len(results)} results")
+        return 0
+    if regressions:
+        report(
+            f"{len(regressions)} regression(s) beyond {args.tolerance:.0%} or the recorded spread: "
+            f"{', '.join(regressions)}"
+        )
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
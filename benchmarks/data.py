@@ -0,0 +1,69 @@
+"""Deterministic synthetic data for the benchmarks."""
+
+import random
+import time
+from typing import Dict, List, Tuple
+
+from src.utils.records import ScheduledMessage
+
+SEED = 1234
+# Scheduled messages are spread over this many seconds from the base time
+SCHEDULE_SPAN_SECONDS = 30 * 24 * 3600
+GUILD_COUNT = 50
+SENDERS = ["Alex", "Sam", "Jordan", "Taylor", "Morgan", "Casey", "Riley", "Jamie"]
+
+_WORDS = [
+    "general", "announcements", "team", "alpha", "beta", "support", "dev", "design",
+    "marketing", "sales", "events", "news", "updates", "random", "help", "feedback",
+    "release", "notes", "ops", "staff", "community", "gaming", "music", "art",
+    "memes", "study", "homework", "raid", "voice", "lounge", "off-topic", "welcome"
+]
+_EMOJI = ["", "", "", "📢-", "🎉-", "💬-"]
+
+
+def base_time() -> float:
+    """A fixed point in the future that schedules are laid out from."""
+    return float(int(time.time()) + 3600)
+
+
+def scheduled_messages(count: int, start: float, seed: int = SEED) -> List[ScheduledMessage]:
+    """``count`` messages due over ``SCHEDULE_SPAN_SECONDS`` after ``start``."""
+    rng = random.Random(seed)
+    messages = []
+    for i in range(count):
+        guild_id = 1000 + rng.randrange(GUILD_COUNT)
+        messages.append(ScheduledMessage(
+            due_at=start + rng.random() * SCHEDULE_SPAN_SECONDS,
+            channel_ids=[guild_id * 10000 + rng.randrange(500) for _ in range(rng.randint(1, 5))],
+            content=f"Scheduled update {i}: " + " ".join(rng.choices(_WORDS, k=rng.randint(3, 30))),
+            sender_name=rng.choice(SENDERS),
+            guild_id=guild_id
+        ))
+    return messages
+
+
+def channel_names(count: int, seed: int = SEED) -> List[Tuple[int, str]]:
+    """``count`` unique (channel ID, name) pairs shaped like a large guild's."""
+    rng = random.Random(seed)
+    channels = []
+    seen = set()
+    while len(channels) < count:
+        name = rng.choice(_EMOJI) + "-".join(rng.choices(_WORDS, k=rng.randint(1, 3)))
+        if name in seen:
+            name = f"{name}-{len(channels)}"
+        seen.add(name)
+        channels.append((900_000_000_000_000_000 + len(channels), name))
+    return channels
+
+
+def channel_options(count: int) -> Dict[str, int]:
+    """Channel picker options (name to ID) for ``count`` channels."""
+    return {name: channel_id for channel_id, name in channel_names(count)}
+
+
+# Typed queries: exact names, prefixes, mid-word fragments and typos
+SEARCH_QUERIES = [
+    "general", "announce", "team alpha", "dev", "mark", "release-notes",
+    "suport", "anouncements", "comunity", "off", "lounge", "raid voice",
+    "ev", "homework help", "feedbak", "zzz"
+]
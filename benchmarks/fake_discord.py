@@ -0,0 +1,270 @@
+"""A local stand-in for the parts of Discord's REST API the bot sends through.
+
+Only what the send paths need is implemented: logging in, creating
+messages (JSON or multipart with file uploads) and downloading
+attachments. Message creation is rate limited per channel and globally
+the way Discord does it: responses carry ``X-RateLimit-*`` headers and
+requests over a limit get a 429 with ``retry_after``, which discord.py
+honours. Point discord.py at the server with ``server.install()``.
+"""
+
+import asyncio
+import json
+import random
+import time
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional, Tuple
+
+import discord
+from aiohttp import web
+
+API_VERSION = 10
+BOT_USER_ID = 100_000_000_000_000_001
+MESSAGES_BUCKET = "fake-channel-messages"
+
+
+def _snowflake(counter: int) -> str:
+    return str(((int(time.time() * 1000) - 1420070400000) << 22) + (counter & 0x3FFFFF))
+
+
+def _user_payload(user_id: int, name: str, bot: bool = False) -> Dict[str, Any]:
+    return {"id": str(user_id), "username": name, "discriminator": "0", "avatar": None, "global_name": name, "bot": bot}
+
+
+def _json_response(data: Any, status: int = 200, headers: Optional[Dict[str, str]] = None) -> web.Response:
+    # discord.py only decodes bodies whose content type is exactly application/json
+    return web.Response(
+        body=json.dumps(data).encode("utf-8"),
+        status=status,
+        headers={**(headers or {}), "Content-Type": "application/json"}
+    )
+
+
+class FixedWindow:
+    """A rate limit bucket that allows ``limit`` requests per ``window`` seconds."""
+
+    __slots__ = ("limit", "window", "reset_at", "remaining")
+
+    def __init__(self, limit: int, window: float):
+        self.limit = limit
+        self.window = window
+        self.reset_at = 0.0
+        self.remaining = limit
+
+    def hit(self, now: float) -> bool:
+        """Count a request; False if the bucket is exhausted."""
+        if now >= self.reset_at:
+            self.reset_at = now + self.window
+            self.remaining = self.limit
+        if self.remaining == 0:
+            return False
+        self.remaining -= 1
+        return True
+
+
+class FakeDiscordServer:
+    """Serves fake Discord REST endpoints and records what was sent.
+
+    Args:
+        latency: Seconds each message create takes to be answered.
+        jitter: Extra random delay of up to this many seconds.
+        channel_limit: Messages allowed per channel per ``channel_window``.
+        channel_window: Length of the per-channel window in seconds.
+        global_limit: Requests allowed per second across all routes.
+        seed: Seed for the latency jitter.
+    """
+
+    def __init__(
+        self,
+        latency: float = 0.05,
+        jitter: float = 0.02,
+        channel_limit: int = 5,
+        channel_window: float = 5.0,
+        global_limit: int = 50,
+        seed: int = 1234
+    ):
+        self.latency = latency
+        self.jitter = jitter
+        self.channel_limit = channel_limit
+        self.channel_window = channel_window
+        self.global_bucket = FixedWindow(global_limit, 1.0)
+        self._channel_buckets: Dict[int, FixedWindow] = {}
+        self._rng = random.Random(seed)
+        self._ids = 0
+        self._assets: Dict[str, Tuple[bytes, str]] = {}
+        self._runner: Optional[web.AppRunner] = None
+        self.base_url = ""
+        self.reset_stats()
+
+        self.app = web.Application(client_max_size=1024 ** 3)
+        self.app.router.add_get(f"/api/v{API_VERSION}/users/@me", self._handle_me)
+        self.app.router.add_get(f"/api/v{API_VERSION}/oauth2/applications/@me", self._handle_application)
+        self.app.router.add_post(f"/api/v{API_VERSION}/channels/{{channel_id}}/messages", self._handle_create_message)
+        self.app.router.add_get("/attachments/{attachment_id}/{filename}", self._handle_attachment)
+
+    def reset_stats(self):
+        self.created = 0
+        self.rate_limited: Dict[str, int] = {"channel": 0, "global": 0}
+        self.uploaded_bytes = 0
+        self.messages_per_channel: Dict[int, int] = {}
+
+    @property
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "messages_created": self.created,
+            "rate_limited": dict(self.rate_limited),
+            "uploaded_bytes": self.uploaded_bytes,
+            "channels": len(self.messages_per_channel)
+        }
+
+    async def start(self, host: str = "127.0.0.1", port: int = 0):
+        self._runner = web.AppRunner(self.app, access_log=None)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, host, port)
+        await site.start()
+        host, port = self._runner.addresses[0][:2]
+        self.base_url = f"http://{host}:{port}"
+
+    async def stop(self):
+        if self._runner is not None:
+            await self._runner.cleanup()
+            self._runner = None
+
+    def install(self):
+        """Send discord.py's REST requests to this server instead of Discord."""
+        discord.http.Route.BASE = f"{self.base_url}/api/v{API_VERSION}"
+
+    def _next_id(self) -> str:
+        self._ids += 1
+        return _snowflake(self._ids)
+
+    def add_asset(self, filename: str, data: bytes, content_type: str = "application/octet-stream") -> Dict[str, Any]:
+        """Host a file for download and return its attachment payload."""
+        attachment_id = self._next_id()
+        self._assets[attachment_id] = (data, content_type)
+        return self._attachment_payload(attachment_id, filename, len(data), content_type)
+
+    def _attachment_payload(self, attachment_id: str, filename: str, size: int, content_type: str) -> Dict[str, Any]:
+        url = f"{self.base_url}/attachments/{attachment_id}/{filename}"
+        return {
+            "id": attachment_id,
+            "filename": filename,
+            "size": size,
+            "url": url,
+            "proxy_url": url,
+            "content_type": content_type
+        }
+
+    @staticmethod
+    def _headers(**extra: str) -> Dict[str, str]:
+        # discord.py treats a 429 without Via as a Cloudflare ban
+        return {"Via": "1.1 fake-discord", **extra}
+
+    async def _handle_me(self, request: web.Request) -> web.Response:
+        return _json_response(_user_payload(BOT_USER_ID, "Reverb", bot=True), headers=self._headers())
+
+    async def _handle_application(self, request: web.Request) -> web.Response:
+        return _json_response({
+            "id": str(BOT_USER_ID),
+            "name": "Reverb",
+            "icon": None,
+            "description": "",
+            "bot_public": False,
+            "bot_require_code_grant": False,
+            "owner": _user_payload(BOT_USER_ID + 1, "owner"),
+            "verify_key": "",
+            "flags": 0
+        }, headers=self._headers())
+
+    async def _handle_attachment(self, request: web.Request) -> web.Response:
+        asset = self._assets.get(request.match_info["attachment_id"])
+        if asset is None:
+            return _json_response({"message": "Unknown Attachment", "code": 10049}, status=404, headers=self._headers())
+        data, content_type = asset
+        return web.Response(body=data, content_type=content_type, headers=self._headers())
+
+    def _rate_limited(self, scope: str, bucket: FixedWindow, now: float) -> web.Response:
+        self.rate_limited[scope] += 1
+        retry_after = round(max(bucket.reset_at - now, 0.001), 3)
+        headers = self._headers(**{
+            "Retry-After": str(retry_after),
+            "X-RateLimit-Scope": "global" if scope == "global" else "user"
+        })
+        if scope == "global":
+            headers["X-RateLimit-Global"] = "true"
+        else:
+            headers.update(self._bucket_headers(bucket, now))
+        return _json_response(
+            {"message": "You are being rate limited.", "retry_after": retry_after, "global": scope == "global", "code": 0},
+            status=429,
+            headers=headers
+        )
+
+    @staticmethod
+    def _bucket_headers(bucket: FixedWindow, now: float) -> Dict[str, str]:
+        return {
+            "X-RateLimit-Limit": str(bucket.limit),
+            "X-RateLimit-Remaining": str(bucket.remaining),
+            "X-RateLimit-Reset": f"{time.time() + bucket.reset_at - now:.3f}",
+            "X-RateLimit-Reset-After": f"{bucket.reset_at - now:.3f}",
+            "X-RateLimit-Bucket": MESSAGES_BUCKET
+        }
+
+    async def _read_message(self, request: web.Request) -> Tuple[Dict[str, Any], List[Tuple[str, int]]]:
+        """The JSON payload and (filename, size) of each uploaded file."""
+        if not request.content_type.startswith("multipart/"):
+            return await request.json(), []
+        payload: Dict[str, Any] = {}
+        files = []
+        reader = await request.multipart()
+        async for part in reader:
+            if part.name == "payload_json":
+                payload = json.loads(await part.text())
+            else:
+                size = 0
+                while True:
+                    chunk = await part.read_chunk()
+                    if not chunk:
+                        break
+                    size += len(chunk)
+                files.append((part.filename or "file", size))
+        return payload, files
+
+    async def _handle_create_message(self, request: web.Request) -> web.Response:
+        channel_id = int(request.match_info["channel_id"])
+        now = time.monotonic()
+        if not self.global_bucket.hit(now):
+            return self._rate_limited("global", self.global_bucket, now)
+        bucket = self._channel_buckets.get(channel_id)
+        if bucket is None:
+            bucket = self._channel_buckets[channel_id] = FixedWindow(self.channel_limit, self.channel_window)
+        if not bucket.hit(now):
+            return self._rate_limited("channel", bucket, now)
+        headers = self._headers(**self._bucket_headers(bucket, now))
+
+        payload, files = await self._read_message(request)
+        await asyncio.sleep(self.latency + self._rng.random() * self.jitter)
+
+        self.created += 1
+        self.messages_per_channel[channel_id] = self.messages_per_channel.get(channel_id, 0) + 1
+        attachments = []
+        for filename, size in files:
+            self.uploaded_bytes += size
+            attachments.append(self._attachment_payload(self._next_id(), filename, size, "application/octet-stream"))
+        return _json_response({
+            "id": self._next_id(),
+            "channel_id": str(channel_id),
+            "author": _user_payload(BOT_USER_ID, "Reverb", bot=True),
+            "content": payload.get("content") or "",
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "edited_timestamp": None,
+            "tts": False,
+            "mention_everyone": False,
+            "mentions": [],
+            "mention_roles": [],
+            "attachments": attachments,
+            "embeds": [],
+            "pinned": False,
+            "type": 0,
+            "flags": 0
+        }, headers=headers)
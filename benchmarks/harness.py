@@ -0,0 +1,189 @@
+"""Benchmark registry, timing and baseline comparison."""
+
+import asyncio
+import fnmatch
+import gc
+import inspect
+import json
+import platform
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+BASELINE_FILE = Path(__file__).with_name("baseline.json")
+# A result whose median is slower than its baseline's by more than this
+# fraction, or by more than the two runs' combined spread if that is larger,
+# is a regression
+DEFAULT_TOLERANCE = 0.25
+DEFAULT_REPEAT = 5
+# Fast benchmarks get extra timed runs until they add up to this many
+# seconds, up to MAX_REPEAT runs, so their medians are as steady as slow ones'
+DEFAULT_MIN_SECONDS = 2.0
+MAX_REPEAT = 25
+# Untimed runs before the timed ones, to warm up imports, caches and the disk
+DEFAULT_WARMUP = 1
+
+# A workload is set up once per repeat and returns (run, ops): ``run`` does
+# ``ops`` operations and may be a coroutine function
+Workload = Tuple[Callable[[], Any], int]
+Setup = Callable[[int, Path], Workload]
+
+
+class Benchmark:
+    """A named workload measured at several data sizes."""
+
+    def __init__(self, name: str, setup: Setup, sizes: Sequence[int], full_sizes: Sequence[int] = ()):
+        self.name = name
+        self.setup = setup
+        self.sizes = tuple(sizes)
+        self.full_sizes = tuple(full_sizes)
+
+    def key(self, size: int) -> str:
+        return f"{self.name}[n={size}]"
+
+
+BENCHMARKS: List[Benchmark] = []
+
+
+def benchmark(name: str, sizes: Sequence[int], full_sizes: Sequence[int] = ()):
+    """Register a workload setup function as a benchmark.
+
+    Args:
+        name: Dotted benchmark name, e.g. ``storage.sqlite.add``.
+        sizes: Data sizes measured on every run.
+        full_sizes: Extra, slower sizes measured only with ``--full``.
+    """
+    def decorator(setup: Setup) -> Setup:
+        BENCHMARKS.append(Benchmark(name, setup, sizes, full_sizes))
+        return setup
+    return decorator
+
+
+def select(patterns: Sequence[str], full: bool) -> List[Tuple[Benchmark, int]]:
+    """The (benchmark, size) pairs whose key matches any glob in ``patterns``."""
+    selected = []
+    for bench in BENCHMARKS:
+        for size in bench.sizes + (bench.full_sizes if full else ()):
+            key = bench.key(size)
+            if not patterns or any(fnmatch.fnmatch(key, f"*{pattern}*") for pattern in patterns):
+                selected.append((bench, size))
+    return selected
+
+
+def _time(run: Callable[[], Any]) -> float:
+    gc.collect()
+    gc.disable()
+    try:
+        start = time.perf_counter()
+        if inspect.iscoroutinefunction(run):
+            asyncio.run(run())
+        else:
+            run()
+        return time.perf_counter() - start
+    finally:
+        gc.enable()
+
+
+def measure(
+    bench: Benchmark,
+    size: int,
+    repeat: int,
+    warmup: int = DEFAULT_WARMUP,
+    min_seconds: float = DEFAULT_MIN_SECONDS
+) -> Dict[str, Any]:
+    """Time a benchmark at least ``repeat`` times, each on freshly set up data.
+
+    ``warmup`` untimed runs come first. More runs follow while the timed
+    ones, including their setup, take less than ``min_seconds`` in total,
+    up to ``MAX_REPEAT``.
+
+    Returns:
+        dict: Seconds per operation (best and median run), the spread of
+        the runs (their interquartile range as a fraction of the median),
+        ops and repeats.
+    """
+    timings = []
+    ops = 1
+    elapsed = 0.0
+    runs = 0
+    while runs < warmup + repeat or (elapsed < min_seconds and len(timings) < max(repeat, MAX_REPEAT)):
+        started = time.perf_counter()
+        with tempfile.TemporaryDirectory(prefix="reverb-bench-") as workdir:
+            run, ops = bench.setup(size, Path(workdir))
+            seconds_per_op = _time(run) / ops
+        runs += 1
+        if runs > warmup:
+            timings.append(seconds_per_op)
+            elapsed += time.perf_counter() - started
+    median = statistics.median(timings)
+    spread = 0.0
+    if len(timings) > 1:
+        lower, _, upper = statistics.quantiles(timings, n=4)
+        spread = (upper - lower) / median
+    return {
+        "seconds_per_op": min(timings),
+        "median_seconds_per_op": median,
+        "spread": spread,
+        "ops": ops,
+        "repeat": len(timings)
+    }
+
+
+def environment() -> Dict[str, str]:
+    return {
+        "python": platform.python_version(),
+        "implementation": platform.python_implementation(),
+        "platform": platform.platform(),
+        "machine": platform.machine()
+    }
+
+
+def load_baseline(path: Path = BASELINE_FILE) -> Dict[str, Any]:
+    if not path.exists():
+        return {"environment": {}, "results": {}}
+    return json.loads(path.read_text())
+
+
+def save_baseline(results: Dict[str, Dict[str, Any]], path: Path = BASELINE_FILE):
+    """Merge ``results`` into the baseline file, replacing matching keys."""
+    baseline = load_baseline(path)
+    baseline["environment"] = environment()
+    baseline["results"].update(results)
+    baseline["results"] = dict(sorted(baseline["results"].items()))
+    path.write_text(json.dumps(baseline, indent=2) + "\n")
+
+
+def compare(result: Dict[str, Any], baseline: Optional[Dict[str, Any]], tolerance: float) -> Tuple[str, Optional[float]]:
+    """Classify a result against its baseline by their median times.
+
+    The tolerance is widened to the combined spread recorded with both
+    results, so benchmarks that are noisy on this machine are not flagged
+    for noise.
+
+    Returns:
+        tuple: (status, ratio of current to baseline median or None), where
+        status is ``new``, ``ok``, ``faster`` or ``REGRESSION``.
+    """
+    if baseline is None:
+        return "new", None
+    ratio = result["median_seconds_per_op"] / baseline["median_seconds_per_op"]
+    tolerance = max(tolerance, result.get("spread", 0.0) + baseline.get("spread", 0.0))
+    if ratio > 1 + tolerance:
+        return "REGRESSION", ratio
+    if ratio < 1 / (1 + tolerance):
+        return "faster", ratio
+    return "ok", ratio
+
+
+def format_seconds(seconds: float) -> str:
+    for unit, scale in (("s", 1), ("ms", 1e-3), ("µs", 1e-6)):
+        if seconds >= scale:
+            return f"{seconds / scale:.2f} {unit}"
+    return f"{seconds / 1e-9:.0f} ns"
+
+
+def report(line: str):
+    print(line, file=sys.stdout, flush=True)
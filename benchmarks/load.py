@@ -0,0 +1,311 @@
+"""End-to-end load test of the send paths against the fake Discord server.
+
+Run from the repository root::
+
+    python -m benchmarks.load --channels 200 --submissions 5
+    python -m benchmarks.load --mode scheduler --messages 500 --attachment-bytes 200000
+
+``MessageModal.on_submit`` and ``ScheduleRunner`` run unmodified on a real
+discord.py client whose REST requests go to a local ``FakeDiscordServer``,
+so the delivery engine, discord.py's own rate limit handling and the
+storage backend are all exercised. No gateway connection or bot token is
+used; guilds and channels are created from synthetic payloads and the
+interaction is a minimal stand-in that records its replies.
+
+Send latency percentiles come from the ``delivery.send`` trace spans.
+The delivery engine is given the fake server's limits, and the run exits
+with status 1 if the server had to answer any request with a 429, since
+the engine is meant to pace sends so that never happens.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+import discord
+
+from .fake_discord import BOT_USER_ID, FakeDiscordServer
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+USER_ID = BOT_USER_ID + 10
+TRACE_CAPACITY = 1_000_000
+
+
+class FakeInteractionResponse:
+    async def defer(self, **kwargs):
+        pass
+
+
+class FakeFollowup:
+    def __init__(self):
+        self.sent: List[str] = []
+
+    async def send(self, content: str, **kwargs):
+        self.sent.append(content)
+
+
+class FakeInteraction:
+    """The parts of ``discord.Interaction`` the modals use."""
+
+    _ids = 0
+
+    def __init__(self, client: discord.Client, guild: discord.Guild):
+        FakeInteraction._ids += 1
+        self.id = FakeInteraction._ids
+        self.client = client
+        self.guild = guild
+        self.user = guild.get_member(USER_ID)
+        self.response = FakeInteractionResponse()
+        self.followup = FakeFollowup()
+
+
+def _guild_payload(guild_id: int, channel_count: int) -> Dict[str, Any]:
+    user = {"id": str(USER_ID), "username": "loadtest", "discriminator": "0", "avatar": None}
+    return {
+        "id": str(guild_id),
+        "name": f"Load Test {guild_id}",
+        "owner_id": str(USER_ID),
+        "roles": [{
+            "id": str(guild_id),
+            "name": "@everyone",
+            "permissions": str(discord.Permissions.text().value),
+            "position": 0,
+            "color": 0,
+            "hoist": False,
+            "managed": False,
+            "mentionable": False
+        }],
+        "channels": [
+            {
+                "id": str(guild_id + 1 + i),
+                "type": 0,
+                "name": f"channel-{i}",
+                "position": i,
+                "permission_overwrites": []
+            }
+            for i in range(channel_count)
+        ],
+        "members": [{"user": user, "roles": [], "joined_at": "2024-01-01T00:00:00+00:00", "deaf": False, "mute": False, "flags": 0}],
+        "member_count": 1
+    }
+
+
+def _percentiles(values: List[float]) -> Dict[str, float]:
+    if not values:
+        return {}
+    values = sorted(values)
+
+    def at(fraction: float) -> float:
+        return values[min(len(values) - 1, int(fraction * len(values)))]
+    return {
+        "p50_ms": round(at(0.50), 3),
+        "p95_ms": round(at(0.95), 3),
+        "p99_ms": round(at(0.99), 3),
+        "max_ms": round(values[-1], 3),
+        "mean_ms": round(statistics.fmean(values), 3)
+    }
+
+
+class LoadTest:
+    """A client logged in to a fake server with synthetic guilds."""
+
+    def __init__(self, args: argparse.Namespace):
+        self.args = args
+        self.server = FakeDiscordServer(
+            latency=args.latency_ms / 1000,
+            jitter=args.jitter_ms / 1000,
+            channel_limit=args.channel_limit,
+            channel_window=args.channel_window,
+            global_limit=args.global_limit
+        )
+        self.client = discord.Client(intents=discord.Intents(guilds=True, members=True))
+        self.guilds: List[discord.Guild] = []
+
+    async def __aenter__(self):
+        await self.server.start()
+        self.server.install()
+        try:
+            await self.client.login("fake-token")
+        except Exception:
+            await self.__aexit__(None, None, None)
+            raise
+        # Nothing connects to the gateway, so mark the client ready by hand
+        self.client._ready.set()
+        state = self.client._connection
+        for i in range(self.args.guilds):
+            guild_id = 200_000_000_000_000_000 + i * 1_000_000
+            self.guilds.append(state._add_guild_from_data(_guild_payload(guild_id, self.args.channels)))
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        await self.client.close()
+        await self.server.stop()
+
+    def _collect(self, name: str, wall: float) -> Dict[str, Any]:
+        from src.utils.tracing import tracer
+
+        sends = []
+        queued = []
+        for trace in tracer.ring_buffer.recent():
+            for span in trace["spans"]:
+                if span["name"] == "delivery.send":
+                    sends.append(span["duration_ms"])
+                    queued.append(span["attributes"].get("queued_ms", 0))
+        stats = self.server.stats
+        return {
+            "workload": name,
+            "wall_seconds": round(wall, 3),
+            "sends": len(sends),
+            "sends_per_second": round(stats["messages_created"] / wall, 2) if wall else None,
+            "send_latency": _percentiles(sends),
+            "queue_wait": _percentiles(queued),
+            "server": stats
+        }
+
+    def _reset(self):
+        from src.utils.tracing import RingBufferExporter, tracer
+
+        tracer.exporters = [RingBufferExporter(TRACE_CAPACITY)]
+        self.server.reset_stats()
+
+    def _attachment(self) -> Optional[discord.Attachment]:
+        if not self.args.attachment_bytes:
+            return None
+        payload = self.server.add_asset("load.bin", os.urandom(self.args.attachment_bytes))
+        return discord.Attachment(data=payload, state=self.client._connection)
+
+    async def run_modal(self) -> Dict[str, Any]:
+        """Submit ``--submissions`` concurrent /postmessage modals, one per guild in turn."""
+        from src.ui.modals import MessageModal
+
+        self._reset()
+        rng = random.Random(1)
+        submissions = []
+        for i in range(self.args.submissions):
+            guild = self.guilds[i % len(self.guilds)]
+            channel_ids = [channel.id for channel in guild.text_channels]
+            if self.args.channels_per_message:
+                channel_ids = rng.sample(channel_ids, min(self.args.channels_per_message, len(channel_ids)))
+            modal = MessageModal(channel_ids, self._attachment())
+            modal.message_input._value = f"Load test message {i}"
+            submissions.append((modal, FakeInteraction(self.client, guild)))
+
+        start = time.perf_counter()
+        await asyncio.gather(*(modal.on_submit(interaction) for modal, interaction in submissions))
+        result = self._collect("modal", time.perf_counter() - start)
+        result["replies"] = [interaction.followup.sent[-1][:80] for _, interaction in submissions[:3]]
+        return result
+
+    async def run_scheduler(self) -> Dict[str, Any]:
+        """Deliver ``--messages`` scheduled messages that are all due now."""
+        from src.utils.blobs import blob_store
+        from src.utils.records import ScheduledMessage
+        from src.utils.scheduler import ScheduleRunner
+        from src.utils.storage import create_store, schedule_manager
+
+        self._reset()
+        schedule_manager.use_store(create_store(self.args.backend))
+        files = []
+        if self.args.attachment_bytes:
+            # Shared through the blob store, which keeps it until the last message is delivered
+            digest = blob_store._write_blob(os.urandom(self.args.attachment_bytes))
+            files = [{"path": str(blob_store.path_for(digest)), "filename": "load.bin", "sha256": digest}]
+
+        rng = random.Random(2)
+        now = time.time()
+        for i in range(self.args.messages):
+            guild = self.guilds[i % len(self.guilds)]
+            channel_ids = [channel.id for channel in guild.text_channels]
+            count = self.args.channels_per_message or len(channel_ids)
+            schedule_manager.add_message(ScheduledMessage(
+                due_at=now - 1,
+                channel_ids=rng.sample(channel_ids, min(count, len(channel_ids))),
+                content=f"Scheduled load test message {i}",
+                sender_name="loadtest",
+                files=files,
+                guild_id=guild.id
+            ))
+        await schedule_manager.flush()
+
+        runner = ScheduleRunner(self.client)
+        start = time.perf_counter()
+        await runner.start()
+        while len(schedule_manager):
+            await asyncio.sleep(0.01)
+        wall = time.perf_counter() - start
+        await runner.stop()
+        await schedule_manager.flush()
+        return self._collect("scheduler", wall)
+
+
+def parse_args(argv=None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.load", description=__doc__.split("\n\n")[0])
+    parser.add_argument("--mode", choices=("modal", "scheduler", "all"), default="all")
+    parser.add_argument("--guilds", type=int, default=1)
+    parser.add_argument("--channels", type=int, default=50, help="Text channels per guild")
+    parser.add_argument("--channels-per-message", type=int, default=0,
+                        help="Channels each message is sent to (default: every channel in its guild)")
+    parser.add_argument("--submissions", type=int, default=1, help="Concurrent modal submissions")
+    parser.add_argument("--messages", type=int, default=20, help="Scheduled messages due at once")
+    parser.add_argument("--attachment-bytes", type=int, default=0, help="Attach a file of this size")
+    parser.add_argument("--link-attachments", action="store_true", help="Use ATTACHMENT_DELIVERY_MODE=link")
+    parser.add_argument("--coalesce", action="store_true", help="Use COALESCE_SCHEDULED_MESSAGES=true")
+    parser.add_argument("--backend", default="sqlite", help="Schedule storage backend")
+    parser.add_argument("--latency-ms", type=float, default=50, help="Fake server response time")
+    parser.add_argument("--jitter-ms", type=float, default=20, help="Random extra response time")
+    parser.add_argument("--channel-limit", type=int, default=5, help="Fake server messages per channel window")
+    parser.add_argument("--channel-window", type=float, default=5.0, help="Fake server channel window in seconds")
+    parser.add_argument("--global-limit", type=int, default=50, help="Fake server requests per second")
+    parser.add_argument("--allow-rate-limits", action="store_true",
+                        help="Exit with status 0 even if the server returned 429s")
+    parser.add_argument("--output", type=Path, help="Also write the results as JSON")
+    return parser.parse_args(argv)
+
+
+async def run(args: argparse.Namespace) -> List[Dict[str, Any]]:
+    results = []
+    async with LoadTest(args) as load_test:
+        if args.mode in ("modal", "all"):
+            results.append(await load_test.run_modal())
+        if args.mode in ("scheduler", "all"):
+            results.append(await load_test.run_scheduler())
+    return results
+
+
+def main(argv=None) -> int:
+    args = parse_args(argv)
+    output_path = args.output.resolve() if args.output else None
+    if args.link_attachments:
+        os.environ["ATTACHMENT_DELIVERY_MODE"] = "link"
+    if args.coalesce:
+        os.environ["COALESCE_SCHEDULED_MESSAGES"] = "true"
+    os.environ.setdefault("GLOBAL_SENDS_PER_SECOND", str(args.global_limit))
+    os.environ.setdefault("CHANNEL_SENDS_PER_5_SECONDS", str(args.channel_limit))
+
+    # The bot creates logs/ and data/ in the working directory on import
+    sys.path.insert(0, str(REPO_ROOT))
+    workdir = tempfile.TemporaryDirectory(prefix="reverb-load-")
+    os.chdir(workdir.name)
+
+    results = asyncio.run(run(args))
+    for result in results:
+        print(json.dumps(result, indent=2))
+    if output_path is not None:
+        output_path.write_text(json.dumps(results, indent=2) + "\n")
+    rate_limited = sum(sum(result["server"]["rate_limited"].values()) for result in results)
+    if rate_limited and not args.allow_rate_limits:
+        print(f"The fake server rate limited {rate_limited} request(s)", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,58 @@
+"""Benchmarks for ScheduleRunner's due-time heap."""
+
+from pathlib import Path
+
+from src.utils.scheduler import ScheduleRunner
+
+from .data import SCHEDULE_SPAN_SECONDS, base_time, scheduled_messages
+from .harness import benchmark
+
+SIZES = (10_000, 100_000)
+FULL_SIZES = (1_000_000,)
+TICKS = 1000
+# Messages that come due on each tick
+DUE_PER_TICK = 10
+CHURN = 1000
+
+
+def _runner(size: int):
+    start = base_time()
+    messages = scheduled_messages(size, start)
+    runner = ScheduleRunner(bot=None)
+    runner._rebuild(messages)
+    return runner, messages, start
+
+
+@benchmark("scheduler.rebuild", SIZES, FULL_SIZES)
+def rebuild(size: int, workdir: Path):
+    runner, messages, _ = _runner(size)
+    return (lambda: runner._rebuild(messages)), 1
+
+
+@benchmark("scheduler.tick", SIZES, FULL_SIZES)
+def tick(size: int, workdir: Path):
+    runner, _, start = _runner(size)
+    step = SCHEDULE_SPAN_SECONDS * DUE_PER_TICK / size
+
+    def run():
+        for i in range(1, TICKS + 1):
+            runner._pop_due(start + step * i)
+            runner._next_delay()
+    return run, TICKS
+
+
+@benchmark("scheduler.churn", SIZES, FULL_SIZES)
+def churn(size: int, workdir: Path):
+    """Reschedule and remove messages through the storage listener."""
+    runner, messages, start = _runner(size)
+    rescheduled = messages[:CHURN]
+    removed = messages[CHURN:2 * CHURN]
+
+    def run():
+        for message in rescheduled:
+            message.due_at += 60
+            runner._on_schedule_change("update", message)
+        for message in removed:
+            runner._on_schedule_change("remove", message)
+        runner._pop_due(start)
+    return run, len(rescheduled) + len(removed)
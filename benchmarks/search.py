@@ -0,0 +1,52 @@
+"""Benchmarks for channel search and the channel picker."""
+
+from pathlib import Path
+
+from src.ui.views import ChannelView
+from src.utils.search import ChannelSearchIndex
+
+from .data import SEARCH_QUERIES, channel_names, channel_options
+from .harness import benchmark
+
+SIZES = (1_000, 5_000)
+FULL_SIZES = (20_000,)
+
+
+@benchmark("search.index_build", SIZES, FULL_SIZES)
+def index_build(size: int, workdir: Path):
+    channels = channel_names(size)
+    return (lambda: ChannelSearchIndex(channels)), 1
+
+
+@benchmark("search.query", SIZES, FULL_SIZES)
+def query(size: int, workdir: Path):
+    channels = channel_names(size)
+    index = ChannelSearchIndex(channels)
+    allowed = {channel_id for channel_id, _ in channels}
+
+    def run():
+        for term in SEARCH_QUERIES:
+            index.search(term, allowed=allowed)
+    return run, len(SEARCH_QUERIES)
+
+
+@benchmark("search.view_open", SIZES, FULL_SIZES)
+def view_open(size: int, workdir: Path):
+    """Build the channel picker as /postmessage does."""
+    options = channel_options(size)
+    index = ChannelSearchIndex((channel_id, name) for name, channel_id in options.items())
+    return (lambda: ChannelView(options, None, search_index=index)), 1
+
+
+@benchmark("search.view_filter", SIZES, FULL_SIZES)
+def view_filter(size: int, workdir: Path):
+    """Filter the channel picker by each query, then clear the search."""
+    options = channel_options(size)
+    index = ChannelSearchIndex((channel_id, name) for name, channel_id in options.items())
+    view = ChannelView(options, None, search_index=index)
+
+    def run():
+        for term in SEARCH_QUERIES:
+            view.update_channel_list(term)
+        view.update_channel_list("")
+    return run, len(SEARCH_QUERIES) + 1
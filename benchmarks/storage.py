@@ -0,0 +1,119 @@
+"""Benchmarks for ScheduleManager on each storage backend."""
+
+import atexit
+import shutil
+import tempfile
+from pathlib import Path
+from typing import Dict, Tuple
+
+from src.utils.storage import (
+    JournalScheduleStore,
+    JsonScheduleStore,
+    ScheduleManager,
+    SqliteScheduleStore
+)
+
+from .data import SCHEDULE_SPAN_SECONDS, base_time, scheduled_messages
+from .harness import benchmark
+
+SIZES = (10_000, 100_000)
+FULL_SIZES = (1_000_000,)
+# Mutations per run; JSON and journal writes are batched as in the bot
+MUTATIONS = 100
+DUE_QUERIES = 10
+
+_templates: Dict[Tuple[str, int], Path] = {}
+_template_root = tempfile.TemporaryDirectory(prefix="reverb-bench-templates-")
+atexit.register(_template_root.cleanup)
+
+
+def _create_store(backend: str, data_dir: Path):
+    if backend == "json":
+        return JsonScheduleStore(data_dir / "scheduled.json")
+    if backend == "sqlite":
+        return SqliteScheduleStore(data_dir / "scheduled.db", json_path=None)
+    # Appends are not fsynced so runs measure the code, not the disk
+    return JournalScheduleStore(
+        data_dir / "scheduled.snapshot.json",
+        data_dir / "scheduled.journal",
+        json_path=None,
+        fsync=False
+    )
+
+
+def _seeded_manager(backend: str, size: int, workdir: Path) -> Tuple[ScheduleManager, float]:
+    """A manager over a copy of a store seeded with ``size`` messages.
+
+    Seeded stores are written once per backend and size, then copied.
+
+    Returns:
+        tuple: (manager, base time the messages are scheduled from).
+    """
+    start = base_time()
+    template = _templates.get((backend, size))
+    if template is None:
+        template = Path(_template_root.name) / f"{backend}-{size}"
+        template.mkdir()
+        store = _create_store(backend, template)
+        store.save(scheduled_messages(size, start))
+        store.close()
+        _templates[(backend, size)] = template
+    data_dir = workdir / "data"
+    shutil.copytree(template, data_dir)
+    return ScheduleManager(_create_store(backend, data_dir)), start
+
+
+def _register(backend: str):
+    @benchmark(f"storage.{backend}.load", SIZES, FULL_SIZES)
+    def load(size: int, workdir: Path):
+        manager, _ = _seeded_manager(backend, size, workdir)
+        manager._store.close()
+        return (lambda: ScheduleManager(_create_store(backend, workdir / "data"))), 1
+
+    @benchmark(f"storage.{backend}.add", SIZES, FULL_SIZES)
+    def add(size: int, workdir: Path):
+        manager, start = _seeded_manager(backend, size, workdir)
+        new_messages = scheduled_messages(MUTATIONS, start, seed=size)
+
+        async def run():
+            for message in new_messages:
+                manager.add_message(message)
+            await manager.flush()
+        return run, MUTATIONS
+
+    @benchmark(f"storage.{backend}.remove", SIZES, FULL_SIZES)
+    def remove(size: int, workdir: Path):
+        manager, _ = _seeded_manager(backend, size, workdir)
+        victims = manager.messages[::max(1, size // MUTATIONS)][:MUTATIONS]
+
+        async def run():
+            for message in victims:
+                manager.remove_message(message)
+            await manager.flush()
+        return run, len(victims)
+
+    @benchmark(f"storage.{backend}.complete", SIZES, FULL_SIZES)
+    def complete(size: int, workdir: Path):
+        manager, _ = _seeded_manager(backend, size, workdir)
+        messages = manager.messages[::max(1, size // MUTATIONS)][:MUTATIONS]
+
+        async def run():
+            for message in messages:
+                manager.mark_channel_complete(message, message.channel_ids[0])
+            await manager.flush()
+        return run, len(messages)
+
+    @benchmark(f"storage.{backend}.due", SIZES, FULL_SIZES)
+    def due(size: int, workdir: Path):
+        manager, start = _seeded_manager(backend, size, workdir)
+        # About 1% of the schedule is due
+        now = start + SCHEDULE_SPAN_SECONDS * 0.01
+
+        def run():
+            for _ in range(DUE_QUERIES):
+                manager.due_messages(now)
+        return run, DUE_QUERIES
+
+
+for _backend in ("json", "sqlite", "journal"):
+    _register(_backend)
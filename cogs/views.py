@@ -2,6 +2,8 @@ import discord
 from discord.ui import View
 from typing import Dict, List
 
+from src.utils.delivery import delivery_engine
+
 class ChannelSearchModal(discord.ui.Modal):
     def __init__(self, channel_view: 'UpdatedChannelView'):
         super().__init__(title="Search Channels")
@@ -53,7 +55,9 @@ class MessageModalWithAttachment(discord.ui.Modal):
                 try:
                     content = f"**Message from {interaction.user.display_name}:**\n{self.message_input.value}" if self.message_input.value else f"**Attachment from {interaction.user.display_name}**"
                     file = await self.attachment.to_file() if self.attachment else None
-                    await channel.send(
+                    await delivery_engine.send(
+                        channel,
+                        path="legacy_modal",
                         content=content,
                         files=[file] if file else None
                     )
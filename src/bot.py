@@ -3,33 +3,57 @@
 import asyncio
 import os
 from datetime import datetime
-from typing import List
+from typing import List, Optional
 
 import discord
 from discord.ext import commands
 from dotenv import load_dotenv
 
-from .utils.logger import setup_logger, get_logger
+from .cluster import cluster_workers, configured_shard_count, run_cluster, worker_metrics_port, worker_path
+from .utils.blobs import blob_store
+from .utils.command_sync import sync_commands
+from .utils.delivery import delivery_engine
+from .utils.logger import LOG_FILE, setup_logger, get_logger
+from .utils.metrics import start_metrics_server
 from .utils.scheduler import ScheduleRunner
+from .utils.sharding import guild_filter
+from .utils.storage import configure_storage, schedule_manager
+from .utils.tracing import TRACE_FILE, configure_tracing, shutdown_tracing
 
 logger = get_logger('bot')
 
 
-class ReverbBot(commands.Bot):
-    """Main bot class for Reverb."""
+class ReverbBot(commands.AutoShardedBot):
+    """Main bot class for Reverb.
+
+    Runs every shard by default. Cluster workers pass the shards they own,
+    out of ``shard_count`` in total.
+    """
     
-    def __init__(self):
+    def __init__(
+        self,
+        shard_ids: Optional[List[int]] = None,
+        shard_count: Optional[int] = None,
+        metrics_port: Optional[int] = None
+    ):
         intents = discord.Intents.default()
         intents.message_content = True
         intents.guilds = True
         intents.messages = True
         
-        super().__init__(command_prefix='!', intents=intents)
-        self.initial_extensions = ['message', 'schedule', 'help']
+        super().__init__(command_prefix='!', intents=intents, shard_ids=shard_ids, shard_count=shard_count)
+        self.initial_extensions = ['message', 'schedule', 'help', 'channels', 'traces']
         self.scheduler = ScheduleRunner(self)
+        self.metrics_port = metrics_port
+        self.metrics_server = None
+
+    @property
+    def syncs_commands(self) -> bool:
+        """Whether this process syncs app commands; in a cluster only shard 0's worker does."""
+        return self.shard_ids is None or 0 in self.shard_ids
 
     async def setup_hook(self) -> None:
-        """Initialize the bot's extensions and sync commands."""
+        """Initialize the bot's extensions and sync commands if they changed."""
         logger.info("Setting up bot extensions and commands")
         
         for ext in self.initial_extensions:
@@ -39,15 +63,32 @@ class ReverbBot(commands.Bot):
             except Exception as e:
                 logger.error(f"Failed to load extension {ext}: {e}", exc_info=True)
 
+        if self.syncs_commands:
+            try:
+                # Skipped when the command tree matches the last synced one
+                synced = await sync_commands(self.tree, self.application_id)
+                if synced is not None:
+                    logger.info(f"Synced {len(synced)} command(s)")
+            except Exception as e:
+                logger.error(f"Error syncing commands: {e}", exc_info=True)
+
         try:
-            synced = await self.tree.sync()
-            logger.info(f"Synced {len(synced)} command(s)")
+            self.metrics_server = await start_metrics_server(self.metrics_port)
         except Exception as e:
-            logger.error(f"Error syncing commands: {e}", exc_info=True)
+            logger.error(f"Error starting metrics server: {e}", exc_info=True)
 
         logger.info("Starting scheduler")
         await self.scheduler.start()
 
+    async def close(self):
+        """Stop the scheduler, flush pending storage writes and traces, and stop the metrics server."""
+        await self.scheduler.stop()
+        await schedule_manager.flush()
+        if self.metrics_server is not None:
+            await self.metrics_server.cleanup()
+        shutdown_tracing()
+        await super().close()
+
     async def on_ready(self):
         """Called when the bot is ready to start."""
         logger.info(f"Bot {self.user} is ready!")
@@ -57,23 +98,58 @@ class ReverbBot(commands.Bot):
         channel_count = sum(len(guild.channels) for guild in self.guilds)
         logger.info(f"Connected to {guild_count} guilds with {channel_count} channels total")
 
+    async def on_shard_ready(self, shard_id: int):
+        logger.info(f"Shard {shard_id} is ready")
 
-def run_bot():
-    """Initialize and run the bot."""
+
+def run_bot(
+    shard_ids: Optional[List[int]] = None,
+    shard_count: Optional[int] = None,
+    worker: Optional[int] = None,
+    cluster_size: int = 1
+):
+    """Initialize and run the bot.
+
+    With ``CLUSTER_WORKERS`` above 1 this runs the cluster supervisor,
+    which calls ``run_bot`` in each worker process with its shards.
+
+    Args:
+        shard_ids: The shards to run, for a cluster worker.
+        shard_count: Total shards; defaults to ``SHARD_COUNT`` or Discord's recommendation.
+        worker: The cluster worker number, which names its log and trace files.
+        cluster_size: Number of cluster workers sharing the bot's global send limits.
+    """
     load_dotenv()
     
     # Initialize logging
     debug_mode = os.getenv('DEBUG', 'false').lower() == 'true'
-    setup_logger(debug_mode)
+    setup_logger(debug_mode, worker_path(LOG_FILE, worker))
     
     TOKEN = os.getenv('DISCORD_TOKEN')
     if TOKEN is None:
         logger.error("DISCORD_TOKEN environment variable is not set")
         raise ValueError("DISCORD_TOKEN environment variable is not set")
+
+    if worker is None and cluster_workers() > 1:
+        run_cluster(TOKEN)
+        return
+
+    if shard_count is None:
+        shard_count = configured_shard_count()
+    if shard_ids is not None:
+        # Other workers own the remaining guilds' messages and blobs
+        blob_store.partition_by_guild(guild_filter(shard_ids, shard_count))
+    # Discord's global rate limit applies to the bot token across all workers
+    delivery_engine.workers = cluster_size
+    configure_storage(shard_ids=shard_ids, shard_count=shard_count)
+    configure_tracing(worker_path(TRACE_FILE, worker))
     
     try:
-        logger.info("Initializing bot")
-        bot = ReverbBot()
+        if worker is None:
+            logger.info("Initializing bot")
+        else:
+            logger.info(f"Initializing bot as cluster worker {worker} with shards {shard_ids} of {shard_count}")
+        bot = ReverbBot(shard_ids=shard_ids, shard_count=shard_count, metrics_port=worker_metrics_port(worker))
         logger.info("Starting bot")
         bot.run(TOKEN)
     except Exception as e:
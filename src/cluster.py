@@ -0,0 +1,298 @@
+"""Cluster mode: running the bot's shards across several worker processes.
+
+With ``CLUSTER_WORKERS`` above 1, ``run_bot`` starts a supervisor instead
+of the bot. The supervisor splits the shards into contiguous ranges and
+starts one worker process per range; each worker runs a ``ReverbBot``
+with those shards and only loads, and therefore only delivers, the
+scheduled messages of the guilds on them. Workers share the SQLite
+schedule database and the attachment blob directory, and write their
+own log and trace files.
+"""
+
+import asyncio
+import math
+import multiprocessing
+import os
+import signal
+import threading
+import time
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+import discord
+
+from .utils.logger import get_logger
+from .utils.sharding import shard_ranges
+from .utils.storage import SqliteScheduleStore, schedule_backend
+
+logger = get_logger('cluster')
+
+# Discord allows one identify per max_concurrency bucket every 5 seconds
+IDENTIFY_INTERVAL = 5.0
+# Workers that crash are restarted after a delay that doubles while they
+# keep crashing within STABLE_SECONDS of starting
+RESTART_DELAY = 5.0
+MAX_RESTART_DELAY = 300.0
+STABLE_SECONDS = 60.0
+# Seconds a stopping worker gets to close before it is killed
+SHUTDOWN_TIMEOUT = 30.0
+
+
+def cluster_workers() -> int:
+    """Number of worker processes to run (``CLUSTER_WORKERS``, default 1)."""
+    return max(1, int(os.getenv('CLUSTER_WORKERS', '1')))
+
+
+def configured_shard_count() -> Optional[int]:
+    """Total shard count from ``SHARD_COUNT``, or None to use Discord's recommendation."""
+    value = os.getenv('SHARD_COUNT')
+    return int(value) if value else None
+
+
+def worker_path(path: Path, worker: Optional[int]) -> Path:
+    """Give a worker its own copy of a per-process file, e.g. ``reverb.worker1.log``."""
+    if worker is None:
+        return path
+    return path.with_name(f"{path.stem}.worker{worker}{path.suffix}")
+
+
+def worker_metrics_port(worker: Optional[int]) -> Optional[int]:
+    """Offset ``METRICS_PORT`` by the worker number so each worker can serve metrics."""
+    port = os.getenv('METRICS_PORT')
+    if not port:
+        return None
+    return int(port) + (worker or 0)
+
+
+async def fetch_gateway_limits(token: str) -> Tuple[int, int]:
+    """Ask Discord for the recommended shard count and identify concurrency.
+
+    Returns:
+        tuple: The recommended shard count and ``max_concurrency``.
+    """
+    http = discord.http.HTTPClient(asyncio.get_running_loop())
+    try:
+        await http.static_login(token)
+        shards, _, session_start_limit = await http.get_bot_gateway()
+    finally:
+        await http.close()
+    return shards, session_start_limit.get('max_concurrency', 1)
+
+
+async def assign_missing_guilds(token: str, store: SqliteScheduleStore):
+    """Give messages stored without a guild ID the guild of their channels.
+
+    Without it they would all belong to shard 0, whose worker cannot see
+    channels of guilds on other shards and would drop them as undeliverable.
+    Messages whose channels are gone or hidden from the bot stay unassigned,
+    as a single process could not deliver them either. Other request
+    errors propagate, so the cluster does not start with unassigned
+    messages it could have placed.
+    """
+    messages = store.without_guild()
+    if not messages:
+        return
+    logger.info(f"Looking up the guilds of {len(messages)} scheduled message(s) stored without one")
+    guild_ids: Dict[int, Optional[int]] = {}
+    http = discord.http.HTTPClient(asyncio.get_running_loop())
+    try:
+        await http.static_login(token)
+        for message in messages:
+            for channel_id in message.channel_ids:
+                if channel_id not in guild_ids:
+                    try:
+                        data = await http.get_channel(channel_id)
+                        guild_ids[channel_id] = int(data["guild_id"]) if data.get("guild_id") else None
+                    except (discord.NotFound, discord.Forbidden):
+                        guild_ids[channel_id] = None
+                if guild_ids[channel_id] is not None:
+                    message.guild_id = guild_ids[channel_id]
+                    store.update(message, messages)
+                    break
+        await store.flush()
+    finally:
+        await http.close()
+    unassigned = sum(1 for message in messages if message.guild_id is None)
+    if unassigned:
+        logger.warning(f"{unassigned} scheduled message(s) have no reachable channel and stay on shard 0")
+
+
+def _run_worker(worker: int, shard_ids: List[int], shard_count: int, cluster_size: int):
+    """Entry point of a worker process."""
+    if hasattr(os, 'setsid'):
+        # Leave the terminal's process group; the supervisor forwards Ctrl+C once
+        os.setsid()
+    from .bot import run_bot
+    run_bot(shard_ids=shard_ids, shard_count=shard_count, worker=worker, cluster_size=cluster_size)
+
+
+class WorkerProcess:
+    """One worker process and its restart state."""
+
+    def __init__(self, worker: int, shard_ids: List[int], shard_count: int, cluster_size: int):
+        self.worker = worker
+        self.shard_ids = shard_ids
+        self.shard_count = shard_count
+        self.cluster_size = cluster_size
+        self.process: Optional[multiprocessing.Process] = None
+        self.started_at = 0.0
+        self.restart_delay = RESTART_DELAY
+        self.restart_at: Optional[float] = None
+
+    @property
+    def label(self) -> str:
+        return f"worker {self.worker} (shards {self.shard_ids[0]}-{self.shard_ids[-1]})"
+
+    def start(self, context):
+        process = context.Process(
+            target=_run_worker,
+            args=(self.worker, self.shard_ids, self.shard_count, self.cluster_size),
+            name=f"reverb-worker-{self.worker}"
+        )
+        process.start()
+        self.process = process
+        self.started_at = time.monotonic()
+        self.restart_at = None
+        logger.info(f"Started {self.label} as pid {self.process.pid}")
+
+    def is_alive(self) -> bool:
+        return self.process is not None and self.process.is_alive()
+
+    def stop(self):
+        """Ask the worker to close the bot, as Ctrl+C would."""
+        if not self.is_alive():
+            return
+        if os.name == 'posix':
+            os.kill(self.process.pid, signal.SIGINT)
+        else:
+            self.process.terminate()
+
+    def join(self, timeout: float):
+        if self.process is None:
+            return
+        self.process.join(timeout)
+        if self.process.is_alive():
+            logger.warning(f"{self.label} did not stop in time, killing it")
+            self.process.kill()
+            self.process.join()
+
+
+class ClusterSupervisor:
+    """Starts the workers, restarts crashed ones and stops them all on exit.
+
+    Args:
+        token: The bot token, used to look up the shard count if not given.
+        workers: Number of worker processes.
+        shard_count: Total shards; defaults to ``SHARD_COUNT`` or Discord's recommendation.
+    """
+
+    def __init__(self, token: str, workers: int, shard_count: Optional[int] = None):
+        self.token = token
+        self.workers = workers
+        self.shard_count = shard_count
+        self.max_concurrency = 1
+        self._context = multiprocessing.get_context('spawn')
+        self._stopping = threading.Event()
+        self._processes: List[WorkerProcess] = []
+
+    def _prepare(self):
+        backend = schedule_backend()
+        if backend != 'sqlite':
+            raise ValueError(
+                f"Cluster mode needs SCHEDULE_BACKEND=sqlite, which workers can share; got {backend}"
+            )
+        # Create the database and import scheduled.json once, before workers race to do it
+        store = SqliteScheduleStore()
+        try:
+            asyncio.run(assign_missing_guilds(self.token, store))
+        finally:
+            store.close()
+
+        if self.shard_count is None:
+            self.shard_count, self.max_concurrency = asyncio.run(fetch_gateway_limits(self.token))
+            logger.info(f"Discord recommends {self.shard_count} shard(s)")
+        ranges = shard_ranges(self.shard_count, self.workers)
+        if len(ranges) < self.workers:
+            logger.warning(f"Only {len(ranges)} worker(s) are needed for {self.shard_count} shard(s)")
+        self._processes = [
+            WorkerProcess(worker, shard_ids, self.shard_count, len(ranges))
+            for worker, shard_ids in enumerate(ranges)
+        ]
+
+    def _identify_time(self, shards: int) -> float:
+        """Seconds a worker needs to identify ``shards`` shards."""
+        return math.ceil(shards / self.max_concurrency) * IDENTIFY_INTERVAL
+
+    def _handle_signal(self, signum, frame):
+        logger.info(f"Received signal {signum}, stopping workers")
+        self._stopping.set()
+
+    def run(self):
+        """Run the cluster until interrupted or every worker exits cleanly."""
+        self._prepare()
+        previous_handlers = {
+            signum: signal.signal(signum, self._handle_signal)
+            for signum in (signal.SIGINT, signal.SIGTERM)
+        }
+        try:
+            # Stagger the workers so their identifies do not exceed Discord's limit
+            for process in self._processes:
+                if self._stopping.is_set():
+                    break
+                process.start(self._context)
+                self._stopping.wait(self._identify_time(len(process.shard_ids)))
+            while not self._stopping.wait(1.0):
+                if not self._supervise():
+                    logger.info("All workers exited")
+                    break
+        finally:
+            self._shutdown()
+            for signum, handler in previous_handlers.items():
+                signal.signal(signum, handler)
+
+    def _supervise(self) -> bool:
+        """Restart crashed workers; False once every worker has exited cleanly."""
+        running = False
+        now = time.monotonic()
+        for process in self._processes:
+            if process.process is None or process.is_alive():
+                running = True
+                continue
+            exitcode = process.process.exitcode
+            if exitcode == 0:
+                continue
+            running = True
+            if process.restart_at is None:
+                if now - process.started_at >= STABLE_SECONDS:
+                    process.restart_delay = RESTART_DELAY
+                logger.error(
+                    f"{process.label} exited with code {exitcode}, "
+                    f"restarting in {process.restart_delay:.0f}s"
+                )
+                process.restart_at = now + process.restart_delay
+                process.restart_delay = min(process.restart_delay * 2, MAX_RESTART_DELAY)
+            elif now >= process.restart_at:
+                process.start(self._context)
+        return running
+
+    def _shutdown(self):
+        for process in self._processes:
+            process.stop()
+        deadline = time.monotonic() + SHUTDOWN_TIMEOUT
+        for process in self._processes:
+            process.join(max(0.0, deadline - time.monotonic()))
+        logger.info("Cluster stopped")
+
+
+def run_cluster(token: str, workers: Optional[int] = None, shard_count: Optional[int] = None):
+    """Run the bot as a cluster of worker processes.
+
+    Args:
+        token: The bot token.
+        workers: Number of workers; defaults to ``CLUSTER_WORKERS``.
+        shard_count: Total shards; defaults to ``SHARD_COUNT`` or Discord's recommendation.
+    """
+    workers = workers or cluster_workers()
+    shard_count = shard_count or configured_shard_count()
+    logger.info(f"Starting cluster with {workers} worker(s)")
+    ClusterSupervisor(token, workers, shard_count).run()
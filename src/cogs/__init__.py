@@ -3,5 +3,7 @@
 from .message import MessageCommands
 from .schedule import ScheduleCommands
 from .help import HelpCommands
+from .channels import ChannelCacheEvents
+from .traces import TraceCommands
 
-__all__ = ["MessageCommands", "ScheduleCommands", "HelpCommands"]
\ No newline at end of file
+__all__ = ["MessageCommands", "ScheduleCommands", "HelpCommands", "ChannelCacheEvents", "TraceCommands"]
\ No newline at end of file
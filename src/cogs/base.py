@@ -2,6 +2,8 @@ from discord.ext import commands
 import discord
 from typing import Dict, List, Optional
 
+from ..utils.permissions import channel_permission_cache
+
 class BaseCog(commands.Cog):
     """Base class for all cogs providing common functionality"""
     
@@ -10,12 +12,7 @@ class BaseCog(commands.Cog):
 
     def _get_allowed_channels(self, interaction: discord.Interaction) -> Dict[str, int]:
         """Get channels where the user has permission to post"""
-        return {
-            channel.name: channel.id
-            for channel in interaction.guild.channels
-            if isinstance(channel, discord.TextChannel) and 
-            channel.permissions_for(interaction.user).send_messages
-        }
+        return channel_permission_cache.get(interaction.user)
 
     async def check_channel_permissions(
         self, 
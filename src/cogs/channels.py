@@ -0,0 +1,58 @@
+import discord
+from discord.ext import commands
+
+from ..utils.permissions import channel_permission_cache
+from ..utils.search import channel_search
+
+
+class ChannelCacheEvents(commands.Cog):
+    """Keeps the channel permission cache and search indexes up to date"""
+
+    def __init__(self, bot):
+        self.bot = bot
+
+    @commands.Cog.listener()
+    async def on_guild_channel_create(self, channel: discord.abc.GuildChannel):
+        channel_permission_cache.invalidate_guild(channel.guild.id)
+        channel_search.update_channel(channel)
+
+    @commands.Cog.listener()
+    async def on_guild_channel_delete(self, channel: discord.abc.GuildChannel):
+        channel_permission_cache.invalidate_guild(channel.guild.id)
+        channel_search.remove_channel(channel)
+
+    @commands.Cog.listener()
+    async def on_guild_channel_update(self, before: discord.abc.GuildChannel, after: discord.abc.GuildChannel):
+        channel_permission_cache.invalidate_guild(after.guild.id)
+        if before.name != after.name or type(before) is not type(after):
+            channel_search.update_channel(after)
+
+    @commands.Cog.listener()
+    async def on_guild_role_update(self, before: discord.Role, after: discord.Role):
+        channel_permission_cache.invalidate_guild(after.guild.id)
+
+    @commands.Cog.listener()
+    async def on_guild_role_delete(self, role: discord.Role):
+        channel_permission_cache.invalidate_guild(role.guild.id)
+
+    @commands.Cog.listener()
+    async def on_guild_update(self, before: discord.Guild, after: discord.Guild):
+        if before.owner_id != after.owner_id:
+            channel_permission_cache.invalidate_guild(after.id)
+
+    @commands.Cog.listener()
+    async def on_guild_remove(self, guild: discord.Guild):
+        channel_permission_cache.invalidate_guild(guild.id)
+        channel_search.discard_guild(guild.id)
+
+    @commands.Cog.listener()
+    async def on_member_update(self, before: discord.Member, after: discord.Member):
+        if before.roles != after.roles or before.timed_out_until != after.timed_out_until:
+            channel_permission_cache.invalidate_member(after.guild.id, after.id)
+
+    @commands.Cog.listener()
+    async def on_member_remove(self, member: discord.Member):
+        channel_permission_cache.invalidate_member(member.guild.id, member.id)
+
+async def setup(bot):
+    await bot.add_cog(ChannelCacheEvents(bot))
@@ -2,6 +2,8 @@ import discord
 from discord import app_commands
 from discord.ext import commands
 from ..ui.views import ChannelView
+from ..utils.search import channel_search
+from ..utils.tracing import span
 
 from .base import BaseCog
 
@@ -14,20 +16,29 @@ class MessageCommands(BaseCog):
         attachment="Optional: Add a file, image, or other attachment to your message"
     )
     async def post_message(self, interaction: discord.Interaction, attachment: discord.Attachment = None):
-        allowed_channels = self._get_allowed_channels(interaction)
-        if not allowed_channels:
-            await interaction.response.send_message(
-                "⚠️ You don't have permission to post in any configured channels.",
-                ephemeral=True
-            )
-            return
+        with span("command.postmessage", guild_id=interaction.guild_id, user_id=interaction.user.id):
+            with span("permissions.allowed_channels"):
+                allowed_channels = self._get_allowed_channels(interaction)
+            if not allowed_channels:
+                await interaction.response.send_message(
+                    "⚠️ You don't have permission to post in any configured channels.",
+                    ephemeral=True
+                )
+                return
 
-        view = ChannelView(allowed_channels, attachment, is_schedule=False)
-        await interaction.response.send_message(
-            "Select channels to post in (you can select multiple):",
-            view=view,
-            ephemeral=True
-        )
+            with span("view.build", channels=len(allowed_channels)):
+                view = ChannelView(
+                    allowed_channels,
+                    attachment,
+                    is_schedule=False,
+                    search_index=channel_search.for_guild(interaction.guild)
+                )
+            with span("respond"):
+                await interaction.response.send_message(
+                    "Select channels to post in (you can select multiple):",
+                    view=view,
+                    ephemeral=True
+                )
 
 async def setup(bot):
     await bot.add_cog(MessageCommands(bot))
@@ -0,0 +1,53 @@
+import discord
+from discord import app_commands
+from discord.ext import commands
+from typing import Optional
+from ..utils.embeds import create_trace_embed, create_traces_embed
+from ..utils.tracing import tracer
+
+class TraceCommands(commands.Cog):
+    def __init__(self, bot):
+        self.bot = bot
+
+    @app_commands.command(name="traces", description="Show timings of recent commands and deliveries")
+    @app_commands.describe(
+        trace_id="Optional: Show the steps of one trace (the first characters are enough)",
+        limit="How many recent traces to list"
+    )
+    @app_commands.default_permissions(administrator=True)
+    @app_commands.guild_only()
+    async def traces(
+        self,
+        interaction: discord.Interaction,
+        trace_id: Optional[str] = None,
+        limit: app_commands.Range[int, 1, 25] = 10
+    ):
+        if not interaction.user.guild_permissions.administrator:
+            await interaction.response.send_message(
+                "⚠️ Only administrators can view traces.",
+                ephemeral=True
+            )
+            return
+
+        ring_buffer = tracer.ring_buffer
+        if ring_buffer is None:
+            await interaction.response.send_message(
+                "⚠️ Traces are not kept in memory. Add `memory` to TRACE_EXPORTERS to view them here.",
+                ephemeral=True
+            )
+            return
+
+        if trace_id:
+            traces = ring_buffer.find(trace_id.strip())
+            if not traces:
+                await interaction.response.send_message(f"No recent trace matches `{trace_id}`.", ephemeral=True)
+                return
+            # A short prefix can match several traces; show the latest
+            full_id = traces[-1]["trace_id"]
+            embed = create_trace_embed(full_id, [trace for trace in traces if trace["trace_id"] == full_id])
+        else:
+            embed = create_traces_embed(ring_buffer.recent(limit))
+        await interaction.response.send_message(embed=embed, ephemeral=True)
+
+async def setup(bot):
+    await bot.add_cog(TraceCommands(bot))
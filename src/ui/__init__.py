@@ -4,6 +4,7 @@ from .views import ChannelView
 from .modals import MessageModal, ScheduleModal
 from .select import ChannelSelect
 from .base import BaseMessageModal, SaveFileContext
+from .state import ChannelSelectionState
 
 __all__ = [
     "ChannelView",
@@ -11,5 +12,6 @@ __all__ = [
     "ScheduleModal",
     "ChannelSelect",
     "BaseMessageModal",
-    "SaveFileContext"
+    "SaveFileContext",
+    "ChannelSelectionState"
 ]
@@ -1,18 +1,28 @@
 """Base modal classes for message handling."""
 
-import os
-from typing import List
+from typing import List, Optional
 
 import discord
 
+from ..utils.blobs import blob_store
+from ..utils.tracing import span
+
 
 class BaseMessageModal(discord.ui.Modal):
     """Base class for message modals with common functionality."""
     
-    def __init__(self, selected_channels: List[int], attachment: discord.Attachment, title: str):
+    def __init__(
+        self,
+        selected_channels: List[int],
+        attachment: discord.Attachment,
+        title: str,
+        trace_id: Optional[str] = None
+    ):
         super().__init__(title=title)
         self.selected_channels = selected_channels
         self.attachment = attachment
+        # Trace of the command that opened the modal, continued on submit
+        self.trace_id = trace_id
         self.message_input = discord.ui.TextInput(
             label="Message (optional)",
             style=discord.TextStyle.paragraph,
@@ -70,29 +80,25 @@ class BaseMessageModal(discord.ui.Modal):
 
 
 class SaveFileContext:
-    """Context manager for saving and cleaning up temporary files."""
+    """Context manager storing an attachment in the blob store.
+
+    Identical payloads share one blob. The blob stays pinned while the
+    context is open and is released on exit; if no scheduled message
+    references it by then, it is deleted.
+    """
 
-    def __init__(self, attachment: discord.Attachment, interaction_id: int):
+    def __init__(self, attachment: discord.Attachment, interaction_id: int, guild_id: Optional[int] = None):
         self.attachment = attachment
         self.interaction_id = interaction_id
+        self.guild_id = guild_id
         self.file_info = None
 
     async def __aenter__(self):
         if self.attachment:
-            temp_dir = "temp_files"
-            os.makedirs(temp_dir, exist_ok=True)
-            file_path = os.path.join(temp_dir, f"{self.interaction_id}_{self.attachment.filename}")
-            await self.attachment.save(file_path)
-            self.file_info = {
-                "path": file_path,
-                "filename": self.attachment.filename
-            }
+            with span("attachment.store", size=self.attachment.size):
+                self.file_info = await blob_store.put_attachment(self.attachment, self.guild_id)
         return self.file_info
 
     async def __aexit__(self, exc_type, exc_val, exc_tb):
-        if exc_type is not None and self.file_info:
-            # Clean up the file if there was an error
-            try:
-                os.remove(self.file_info["path"])
-            except Exception:
-                pass
+        if self.file_info:
+            blob_store.unpin(self.file_info["path"])
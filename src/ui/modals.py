@@ -1,49 +1,94 @@
 """Modal dialogs for the bot's UI."""
 
 from datetime import datetime
-from typing import List
+from typing import List, Optional
 
 import discord
 
+from ..utils.attachments import AttachmentBuffer
+from ..utils.delivery import (
+    append_attachment_links,
+    attachment_links_enabled,
+    broadcast,
+    delivery_engine,
+    get_staging_channel_id
+)
+from ..utils.records import ScheduledMessage
 from ..utils.storage import add_scheduled_message
+from ..utils.tracing import span
 from .base import BaseMessageModal, SaveFileContext
 
 class MessageModal(BaseMessageModal):
     """Modal for sending immediate messages."""
 
-    def __init__(self, selected_channels: List[int], attachment: discord.Attachment):
-        super().__init__(selected_channels, attachment, title="Message Content")
+    def __init__(self, selected_channels: List[int], attachment: discord.Attachment, trace_id: Optional[str] = None):
+        super().__init__(selected_channels, attachment, title="Message Content", trace_id=trace_id)
+
+    async def _send_to_channel(
+        self,
+        interaction: discord.Interaction,
+        channel_id: int,
+        attachment_buffer: AttachmentBuffer,
+        attachment_urls: Optional[List[str]] = None
+    ) -> tuple[bool, str, Optional[discord.Message]]:
+        """Send the message to one channel.
+
+        Returns:
+            tuple: (success, summary entry, sent message or None).
+        """
+        channel = interaction.guild.get_channel(channel_id)
+        if not isinstance(channel, discord.TextChannel):
+            return False, f"{channel.name} (invalid channel type)", None
+
+        if not channel.permissions_for(interaction.user).send_messages:
+            return False, f"{channel.name} (no permission)", None
+
+        try:
+            content = self._format_content(interaction.user.display_name)
+            if attachment_urls is not None:
+                content = append_attachment_links(content, attachment_urls)
+                file = None
+            else:
+                file = attachment_buffer.to_file()
+            message = await delivery_engine.send(
+                channel,
+                path="modal",
+                content=content,
+                files=[file] if file else None
+            )
+            return True, channel.name, message
+        except discord.Forbidden:
+            return False, f"{channel.name} (no permission)", None
+        except Exception as e:
+            return False, f"{channel.name} (error: {str(e)})", None
 
     async def on_submit(self, interaction: discord.Interaction):
         try:
-            await interaction.response.defer(ephemeral=True)
-            success_channels = []
-            failed_channels = []
-            
-            for channel_id in self.selected_channels:
-                channel = interaction.guild.get_channel(channel_id)
-                if not isinstance(channel, discord.TextChannel):
-                    failed_channels.append(f"{channel.name} (invalid channel type)")
-                    continue
-                    
-                if not channel.permissions_for(interaction.user).send_messages:
-                    failed_channels.append(f"{channel.name} (no permission)")
-                    continue
-                
-                try:
-                    content = self._format_content(interaction.user.display_name)
-                    file = await self.attachment.to_file() if self.attachment else None
-                    await channel.send(
-                        content=content,
-                        files=[file] if file else None
-                    )
-                    success_channels.append(channel.name)
-                except discord.Forbidden:
-                    failed_channels.append(f"{channel.name} (no permission)")
-                except Exception as e:
-                    failed_channels.append(f"{channel.name} (error: {str(e)})")
-            
-            await self._handle_response(interaction, success_channels, failed_channels)
+            with span("modal.postmessage", trace_id=self.trace_id, channels=len(self.selected_channels)):
+                await interaction.response.defer(ephemeral=True)
+
+                # The attachment is downloaded once and shared by every send, which
+                # run concurrently within the delivery engine's limits
+                async with AttachmentBuffer(self.attachment) as attachment_buffer:
+                    link_attachments = self.attachment is not None and attachment_links_enabled()
+                    staging_channel_id = get_staging_channel_id() if link_attachments else None
+                    staging_channel = interaction.client.get_channel(staging_channel_id) if staging_channel_id else None
+                    with span("broadcast"):
+                        results = await broadcast(
+                            self.selected_channels,
+                            lambda channel_id, urls: self._send_to_channel(
+                                interaction, channel_id, attachment_buffer, urls
+                            ),
+                            link_attachments=link_attachments,
+                            staging_channel=staging_channel,
+                            make_files=lambda: [attachment_buffer.to_file()],
+                            path="modal"
+                        )
+                success_channels = [entry for success, entry, _ in results if success]
+                failed_channels = [entry for success, entry, _ in results if not success]
+
+                with span("respond"):
+                    await self._handle_response(interaction, success_channels, failed_channels)
                 
         except Exception as e:
             try:
@@ -55,8 +100,8 @@ class MessageModal(BaseMessageModal):
 class ScheduleModal(BaseMessageModal):
     """Modal for scheduling messages."""
 
-    def __init__(self, selected_channels: List[int], attachment: discord.Attachment):
-        super().__init__(selected_channels, attachment, title="Schedule Message")
+    def __init__(self, selected_channels: List[int], attachment: discord.Attachment, trace_id: Optional[str] = None):
+        super().__init__(selected_channels, attachment, title="Schedule Message", trace_id=trace_id)
         self.time_input = discord.ui.TextInput(
             label="Time (MM/DD/YYYY HH:MM AM/PM)",
             style=discord.TextStyle.short,
@@ -84,36 +129,41 @@ class ScheduleModal(BaseMessageModal):
 
     async def on_submit(self, interaction: discord.Interaction):
         try:
-            await interaction.response.defer(ephemeral=True)
-            
-            scheduled_time = await self._validate_time(interaction)
-            if not scheduled_time:
-                return
+            with span("modal.schedulemessage", trace_id=self.trace_id, channels=len(self.selected_channels)):
+                await interaction.response.defer(ephemeral=True)
+                
+                scheduled_time = await self._validate_time(interaction)
+                if not scheduled_time:
+                    return
 
-            valid_channels, invalid_channels = await self._validate_channels(interaction)
-            
-            if not valid_channels:
-                await interaction.followup.send(
-                    f"❌ Cannot schedule message: No valid channels with proper permissions.\nFailed channels: {', '.join(invalid_channels)}", 
-                    ephemeral=True
-                )
-                return
-
-            async with SaveFileContext(self.attachment, interaction.id) as saved_file:
-                message = {
-                    "channel_ids": valid_channels,
-                    "content": self.message_input.value or None,
-                    "files": [saved_file] if saved_file else [],
-                    "timestamp": scheduled_time.isoformat(),
-                    "sender_name": interaction.user.display_name
-                }
-                add_scheduled_message(message)
-            
-            response = f"✅ Message scheduled for {scheduled_time.strftime('%m/%d/%Y %I:%M %p')}"
-            if invalid_channels:
-                response += f"\n⚠️ Note: Message will not be sent to: {', '.join(invalid_channels)}"
-            
-            await interaction.followup.send(response, ephemeral=True)
+                with span("validate_channels"):
+                    valid_channels, invalid_channels = await self._validate_channels(interaction)
+                
+                if not valid_channels:
+                    await interaction.followup.send(
+                        f"❌ Cannot schedule message: No valid channels with proper permissions.\nFailed channels: {', '.join(invalid_channels)}", 
+                        ephemeral=True
+                    )
+                    return
+
+                async with SaveFileContext(self.attachment, interaction.id, interaction.guild.id) as saved_file:
+                    message = ScheduledMessage(
+                        due_at=scheduled_time.timestamp(),
+                        channel_ids=valid_channels,
+                        content=self.message_input.value or None,
+                        sender_name=interaction.user.display_name,
+                        files=[saved_file] if saved_file else [],
+                        guild_id=interaction.guild.id
+                    )
+                    with span("storage.add", message_id=message.id):
+                        add_scheduled_message(message)
+                
+                response = f"✅ Message scheduled for {scheduled_time.strftime('%m/%d/%Y %I:%M %p')}"
+                if invalid_channels:
+                    response += f"\n⚠️ Note: Message will not be sent to: {', '.join(invalid_channels)}"
+                
+                with span("respond"):
+                    await interaction.followup.send(response, ephemeral=True)
             
         except Exception as e:
             try:
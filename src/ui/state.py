@@ -0,0 +1,74 @@
+"""Selection state shared by the channel picker components."""
+
+from typing import Dict, Iterable, List, Optional, Tuple
+
+PLACEHOLDER = "Select channels to post in..."
+
+
+class ChannelSelectionState:
+    """The channels a picker offers and the ones the user has selected.
+
+    Channel names are looked up from a map built once per view. Selections
+    are kept in an insertion-ordered dict used as a set, keyed by the string
+    channel IDs that select menus use as option values, so membership checks
+    and updates are O(1) and the summary text only looks at the first few
+    selections.
+    """
+
+    def __init__(self, options: Dict[str, int]):
+        self.names: Dict[str, str] = {str(cid): name for name, cid in options.items()}
+        self.channel_ids: List[int] = list(options.values())
+        self._selected: Dict[str, None] = {}
+
+    def name(self, value: str) -> Optional[str]:
+        return self.names.get(value)
+
+    def is_selected(self, value: str) -> bool:
+        return value in self._selected
+
+    @property
+    def count(self) -> int:
+        return len(self._selected)
+
+    @property
+    def selected_channel_ids(self) -> List[int]:
+        return [int(value) for value in self._selected]
+
+    def update_page(self, visible: Iterable[str], chosen: Iterable[str]) -> Tuple[str, ...]:
+        """Apply the choices made on one page, keeping other pages' choices.
+
+        Returns:
+            tuple: The visible values whose selected state changed.
+        """
+        chosen = set(chosen)
+        changed = []
+        for value in visible:
+            if value in chosen and value not in self._selected:
+                self._selected[value] = None
+                changed.append(value)
+            elif value not in chosen and value in self._selected:
+                del self._selected[value]
+                changed.append(value)
+        return tuple(changed)
+
+    def _first_names(self, limit: int) -> List[str]:
+        names = []
+        for value in self._selected:
+            names.append(self.names.get(value, "Unknown")[:15])
+            if len(names) == limit:
+                break
+        return names
+
+    def placeholder(self) -> str:
+        if not self._selected:
+            return PLACEHOLDER
+        if self.count > 2:
+            return f"Selected: {self._first_names(1)[0]} +{self.count - 1} more"
+        return f"Selected: {', '.join(self._first_names(2))}"
+
+    def confirm_label(self) -> str:
+        if not self._selected:
+            return "Confirm Selection"
+        if self.count == 1:
+            return f"Confirm: {self._first_names(1)[0]}"
+        return f"Confirm ({self.count} selected)"
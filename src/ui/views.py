@@ -1,11 +1,14 @@
 """Channel view components."""
 
-from typing import Dict, TYPE_CHECKING
+from typing import Dict, List, Optional, TYPE_CHECKING
 
 import discord
 from discord.ui import View
 
+from ..utils.search import ChannelSearchIndex
+from ..utils.tracing import current_trace_id, span
 from .modals import MessageModal, ScheduleModal
+from .state import ChannelSelectionState
 
 if TYPE_CHECKING:
     from .select import ChannelSelect
@@ -27,21 +30,51 @@ class ChannelSearchModal(discord.ui.Modal):
 
     async def on_submit(self, interaction: discord.Interaction):
         """Process the search input and update the channel list."""
-        search_term = self.search_input.value.lower()
-        self.channel_view.update_channel_list(search_term)
-        await interaction.response.edit_message(view=self.channel_view)
+        with span("view.search", trace_id=self.channel_view.trace_id) as search_span:
+            search_term = self.search_input.value.lower()
+            self.channel_view.update_channel_list(search_term)
+            if search_span is not None:
+                search_span.set_attribute("matches", len(self.channel_view.filtered_ids))
+            await interaction.response.edit_message(view=self.channel_view)
 
 from .select import ChannelSelect  # Has to be imported after ChannelSearchModal
 
-class ChannelView(View):
-    """View for selecting and managing channels."""
+# Discord allows at most 25 options in a select menu
+PAGE_SIZE = 25
+BUTTON_IDS = ("search", "clear", "confirm", "previous", "next")
+
 
-    def __init__(self, options: Dict[str, int], attachment, is_schedule: bool = False):
+class ChannelView(View):
+    """View for selecting and managing channels.
+
+    Matching channels are shown a page at a time. Only the visible page is
+    turned into select options, and selections on other pages are kept in
+    the shared ``state``. Components are referenced directly, so a click
+    only updates the parts of the view it affects. Interactions with the
+    view are traced under the trace of the command that created it.
+    """
+
+    def __init__(
+        self,
+        options: Dict[str, int],
+        attachment,
+        is_schedule: bool = False,
+        search_index: Optional[ChannelSearchIndex] = None,
+        trace_id: Optional[str] = None
+    ):
         super().__init__(timeout=180)
-        self.all_options = options
+        self.trace_id = trace_id or current_trace_id()
+        self.state = ChannelSelectionState(options)
+        self._allowed_ids = set(self.state.channel_ids)
+        # The guild index is shared; without one, index just these options
+        self.search_index = search_index or ChannelSearchIndex(
+            (cid, name) for name, cid in options.items()
+        )
         self.attachment = attachment
         self.is_schedule = is_schedule
-        self.selected_values = []
+        self.filtered_ids: List[int] = self.state.channel_ids
+        self.page = 0
+        self.select_menu: Optional[ChannelSelect] = None
         
         # Add buttons
         self.add_item(discord.ui.Button(
@@ -56,75 +89,114 @@ class ChannelView(View):
             custom_id="clear",
             row=0
         ))
-        self.add_item(discord.ui.Button(
+        self.confirm_button = discord.ui.Button(
             label="Confirm Selection",
             style=discord.ButtonStyle.primary,
             custom_id="confirm",
             row=2,
             disabled=True
-        ))
+        )
+        self.add_item(self.confirm_button)
+        self.previous_button = discord.ui.Button(
+            label="◀ Previous",
+            style=discord.ButtonStyle.secondary,
+            custom_id="previous",
+            row=3
+        )
+        self.page_button = discord.ui.Button(
+            label="Page 1/1",
+            style=discord.ButtonStyle.secondary,
+            custom_id="page",
+            row=3,
+            disabled=True
+        )
+        self.next_button = discord.ui.Button(
+            label="Next ▶",
+            style=discord.ButtonStyle.secondary,
+            custom_id="next",
+            row=3
+        )
         
         self.update_channel_list()
 
+    @property
+    def page_count(self) -> int:
+        return max(1, -(-len(self.filtered_ids) // PAGE_SIZE))
+
     def update_channel_list(self, search_term: str = ""):
         """Update the channel list based on search term."""
+        # Rank matching channels with the search index, best first
+        if search_term:
+            self.filtered_ids = self.search_index.search(search_term, allowed=self._allowed_ids)
+        else:
+            self.filtered_ids = self.state.channel_ids
+        self.show_page(0)
+
+    def _update_page_buttons(self):
+        paged = self.page_count > 1
+        for button in (self.previous_button, self.page_button, self.next_button):
+            if paged and button not in self.children:
+                self.add_item(button)
+            elif not paged and button in self.children:
+                self.remove_item(button)
+        self.page_button.label = f"Page {self.page + 1}/{self.page_count}"
+        self.previous_button.disabled = self.page == 0
+        self.next_button.disabled = self.page >= self.page_count - 1
+
+    def show_page(self, page: int):
+        """Show one page of the matching channels."""
         # Remove existing select menu
-        for item in self.children[:]:
-            if isinstance(item, ChannelSelect):
-                self.remove_item(item)
+        if self.select_menu is not None:
+            self.remove_item(self.select_menu)
+            self.select_menu = None
 
-        # Filter channels based on search term
-        filtered_options = {
-            name: cid
-            for name, cid in self.all_options.items()
-            if search_term.lower() in name.lower()
-        }
+        self.page = min(max(page, 0), self.page_count - 1)
+        self._update_page_buttons()
 
         # Add new select menu if there are matching channels
-        if filtered_options:
-            select_menu = ChannelSelect(
-                filtered_options, 
-                self.attachment, 
-                self.is_schedule,
-                selected_values=self.selected_values
-            )
-            select_menu.row = 1
-            self.add_item(select_menu)
-
-        # Update confirm button state
-        confirm_button = next(
-            (item for item in self.children if isinstance(item, discord.ui.Button) and item.custom_id == "confirm"),
-            None
-        )
-        
-        if confirm_button:
-            if self.selected_values:
-                confirm_button.disabled = False
-                confirm_button.label = f"Confirm ({len(self.selected_values)} selected)"
-            else:
-                confirm_button.disabled = True
-                confirm_button.label = "Confirm Selection"
+        start = self.page * PAGE_SIZE
+        page_ids = self.filtered_ids[start:start + PAGE_SIZE]
+        if page_ids:
+            self.select_menu = ChannelSelect(page_ids, self.attachment, self.is_schedule, self.state)
+            self.select_menu.row = 1
+            self.add_item(self.select_menu)
+
+        self.update_confirm_button()
+
+    def update_confirm_button(self):
+        """Update the confirm button state based on current selection."""
+        self.confirm_button.disabled = not self.state.count
+        self.confirm_button.label = self.state.confirm_label()
 
     async def interaction_check(self, interaction: discord.Interaction) -> bool:
         """Handle button interactions."""
+        custom_id = interaction.data["custom_id"]
+        # Select menu interactions are traced by the menu's callback
+        if custom_id in BUTTON_IDS:
+            with span(f"view.{custom_id}", trace_id=self.trace_id):
+                await self._handle_button(interaction)
+        return True
+
+    async def _handle_button(self, interaction: discord.Interaction):
         if interaction.data["custom_id"] == "search":
-            select_menu = next((item for item in self.children if isinstance(item, ChannelSelect)), None)
-            if select_menu and select_menu.values:
-                self.selected_values = select_menu.values
             await interaction.response.send_modal(ChannelSearchModal(self))
+
+        elif interaction.data["custom_id"] in ("previous", "next"):
+            step = 1 if interaction.data["custom_id"] == "next" else -1
+            self.show_page(self.page + step)
+            await interaction.response.edit_message(view=self)
             
         elif interaction.data["custom_id"] == "clear":
             self.update_channel_list("")
             await interaction.response.edit_message(view=self)
             
         elif interaction.data["custom_id"] == "confirm":
-            if self.selected_values:
-                selected_channels = [int(v) for v in self.selected_values]
-                modal = ScheduleModal(selected_channels, self.attachment) if self.is_schedule else MessageModal(selected_channels, self.attachment)
+            if self.state.count:
+                selected_channels = self.state.selected_channel_ids
+                modal_class = ScheduleModal if self.is_schedule else MessageModal
+                modal = modal_class(selected_channels, self.attachment, trace_id=self.trace_id)
                 await interaction.response.send_modal(modal)
             else:
                 await interaction.response.send_message("Please select at least one channel first.", ephemeral=True)
-        
-        return True
 
 
@@ -2,22 +2,55 @@
 
 from .storage import (
     ScheduleManager,
+    JsonScheduleStore,
+    SqliteScheduleStore,
+    JournalScheduleStore,
     schedule_manager,
+    configure_storage,
     load_scheduled_messages,
     save_scheduled_messages,
     add_scheduled_message,
     remove_scheduled_message
 )
+from .records import ScheduledMessage
 from .scheduler import ScheduleRunner
+from .blobs import BlobStore, blob_store
+from .permissions import ChannelPermissionCache, channel_permission_cache
+from .search import ChannelSearchIndex, channel_search
+from .metrics import MetricsRegistry, registry as metrics_registry, start_metrics_server
+from .tracing import Tracer, tracer, configure_tracing
+from .command_sync import command_tree_fingerprint, sync_commands
+from .sharding import shard_for_guild, shard_ranges
 from .embeds import create_help_embed
 
 __all__ = [
     "ScheduleManager",
+    "JsonScheduleStore",
+    "SqliteScheduleStore",
+    "JournalScheduleStore",
     "schedule_manager",
+    "configure_storage",
     "load_scheduled_messages",
     "save_scheduled_messages", 
     "add_scheduled_message",
     "remove_scheduled_message",
+    "ScheduledMessage",
     "ScheduleRunner",
+    "BlobStore",
+    "blob_store",
+    "ChannelPermissionCache",
+    "channel_permission_cache",
+    "ChannelSearchIndex",
+    "channel_search",
+    "MetricsRegistry",
+    "metrics_registry",
+    "start_metrics_server",
+    "Tracer",
+    "tracer",
+    "configure_tracing",
+    "command_tree_fingerprint",
+    "sync_commands",
+    "shard_for_guild",
+    "shard_ranges",
     "create_help_embed"
 ]
@@ -0,0 +1,116 @@
+"""Shared attachment buffers for multi-channel sends."""
+
+import asyncio
+import io
+import os
+import tempfile
+from typing import Optional
+
+import aiohttp
+import discord
+
+from .logger import get_logger
+from .tracing import span
+
+logger = get_logger('attachments')
+
+TEMP_DIR = "temp_files"
+# Attachments larger than this are kept on disk instead of in memory
+DEFAULT_SPILL_THRESHOLD = 8 * 1024 * 1024
+# Size of the pieces a spilled attachment is downloaded and written in
+DOWNLOAD_CHUNK_SIZE = 1024 * 1024
+
+
+class AttachmentBuffer:
+    """Downloads an attachment once and hands out a ``discord.File`` per send.
+
+    Small attachments are held in memory as immutable bytes and each file
+    gets its own ``BytesIO`` over them, which does not copy the data. Large
+    attachments are streamed to a temporary file in chunks, written off the
+    event loop, and each send reopens the file. The buffer is an async
+    context manager that removes the spill file on exit. A ``None``
+    attachment is allowed and yields no files.
+    """
+
+    def __init__(self, attachment: Optional[discord.Attachment], spill_threshold: Optional[int] = None):
+        self.attachment = attachment
+        if spill_threshold is None:
+            spill_threshold = int(os.getenv('ATTACHMENT_SPILL_BYTES', DEFAULT_SPILL_THRESHOLD))
+        self.spill_threshold = spill_threshold
+        self._data: Optional[bytes] = None
+        self._path: Optional[str] = None
+
+    async def __aenter__(self):
+        await self.load()
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    async def load(self):
+        """Download the attachment if it has not been downloaded yet."""
+        if self.attachment is None or self._data is not None or self._path is not None:
+            return
+
+        with span("attachment.download", size=self.attachment.size):
+            if self.attachment.size > self.spill_threshold:
+                os.makedirs(TEMP_DIR, exist_ok=True)
+                fd, path = tempfile.mkstemp(prefix="buffer_", suffix=f"_{self.attachment.filename}", dir=TEMP_DIR)
+                os.close(fd)
+                try:
+                    await self._download_to(path)
+                except Exception:
+                    os.remove(path)
+                    raise
+                self._path = path
+                logger.debug(f"Buffered attachment {self.attachment.filename} on disk at {path}")
+            else:
+                self._data = await self.attachment.read()
+                logger.debug(f"Buffered attachment {self.attachment.filename} in memory")
+
+    async def _download_to(self, path: str):
+        """Stream the attachment into ``path`` without holding it in memory."""
+        # discord.py's Attachment.save reads the whole payload into memory first
+        http = self.attachment._http
+        kwargs = {}
+        if http.proxy is not None:
+            kwargs['proxy'] = http.proxy
+        if http.proxy_auth is not None:
+            kwargs['proxy_auth'] = http.proxy_auth
+        async with aiohttp.ClientSession() as session:
+            async with session.get(self.attachment.url, **kwargs) as response:
+                if response.status == 404:
+                    raise discord.NotFound(response, 'asset not found')
+                if response.status == 403:
+                    raise discord.Forbidden(response, 'cannot retrieve asset')
+                if response.status != 200:
+                    raise discord.HTTPException(response, 'failed to get asset')
+                with open(path, "wb") as f:
+                    async for chunk in response.content.iter_chunked(DOWNLOAD_CHUNK_SIZE):
+                        await asyncio.to_thread(f.write, chunk)
+
+    def to_file(self) -> Optional[discord.File]:
+        """Create a new ``discord.File`` backed by the shared buffer."""
+        if self.attachment is None:
+            return None
+        if self._path is not None:
+            fp = self._path
+        elif self._data is not None:
+            fp = io.BytesIO(self._data)
+        else:
+            raise RuntimeError("Attachment buffer has not been loaded")
+        return discord.File(
+            fp,
+            filename=self.attachment.filename,
+            description=self.attachment.description
+        )
+
+    def close(self):
+        """Release the buffered data and remove any spill file."""
+        self._data = None
+        if self._path is not None:
+            try:
+                os.remove(self._path)
+            except OSError as e:
+                logger.error(f"Error removing buffered attachment {self._path}: {e}")
+            self._path = None
@@ -0,0 +1,183 @@
+"""Content-addressed storage for scheduled message attachments."""
+
+import asyncio
+import hashlib
+import os
+import tempfile
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional
+
+import discord
+
+from .logger import get_logger
+from .records import ScheduledMessage
+from .sharding import GuildFilter
+from .storage import schedule_manager
+
+logger = get_logger('blobs')
+
+BLOB_DIR = Path("temp_files") / "blobs"
+
+
+class BlobStore:
+    """Stores attachment payloads once per unique SHA-256 digest.
+
+    Blobs are reference counted from the scheduled messages that use them;
+    the counts follow the schedule manager through its listener, so a blob
+    is deleted once the last message referencing it is delivered or
+    removed. ``put_attachment`` also pins the blob until ``unpin`` is
+    called, which keeps it alive while the referencing message is created.
+    Counts are kept per blob path.
+
+    Cluster workers share the blob directory but only see their own
+    guilds' messages, so after ``partition_by_guild`` blobs are stored per
+    guild and only those of owned guilds are ever deleted.
+    """
+
+    def __init__(self, root: Path = BLOB_DIR):
+        self.root = Path(root)
+        self._refcounts: Dict[str, int] = {}
+        self._pins: Dict[str, int] = {}
+        self._owns_guild: Optional[GuildFilter] = None
+
+    def partition_by_guild(self, owns_guild: GuildFilter):
+        """Store new blobs per guild and only manage the guilds ``owns_guild`` accepts."""
+        self._owns_guild = owns_guild
+
+    def path_for(self, digest: str, guild_id: Optional[int] = None) -> Path:
+        if self._owns_guild is not None and guild_id is not None:
+            return self.root / "guilds" / str(guild_id) / digest[:2] / digest
+        return self.root / digest[:2] / digest
+
+    def _write_blob(self, data: bytes, guild_id: Optional[int] = None) -> str:
+        """Hash data and write it unless an identical blob already exists."""
+        digest = hashlib.sha256(data).hexdigest()
+        path = self.path_for(digest, guild_id)
+        if not path.exists():
+            path.parent.mkdir(parents=True, exist_ok=True)
+            fd, temp_path = tempfile.mkstemp(dir=path.parent, suffix=".tmp")
+            try:
+                with os.fdopen(fd, "wb") as f:
+                    f.write(data)
+                os.replace(temp_path, path)
+            except Exception:
+                os.remove(temp_path)
+                raise
+        return digest
+
+    async def put_attachment(self, attachment: discord.Attachment, guild_id: Optional[int] = None) -> Dict[str, str]:
+        """Store an attachment and pin its blob.
+
+        Hashing and writing run in a worker thread. The caller must call
+        ``unpin`` with the returned path once the blob is referenced.
+
+        Args:
+            attachment: The attachment to store.
+            guild_id: The guild the attachment is scheduled in.
+
+        Returns:
+            dict: File info with ``path``, ``filename`` and ``sha256`` keys.
+        """
+        data = await attachment.read()
+        digest = await asyncio.to_thread(self._write_blob, data, guild_id)
+        path = str(self.path_for(digest, guild_id))
+        self._pins[path] = self._pins.get(path, 0) + 1
+        logger.debug(f"Stored attachment {attachment.filename} as blob {digest}")
+        return {
+            "path": path,
+            "filename": attachment.filename,
+            "sha256": digest
+        }
+
+    def acquire(self, path: str):
+        self._refcounts[path] = self._refcounts.get(path, 0) + 1
+
+    def release(self, path: str):
+        """Drop one message reference and delete the blob when none remain."""
+        self._decrement(self._refcounts, path)
+
+    def unpin(self, path: str):
+        """Drop the pin taken by ``put_attachment``."""
+        self._decrement(self._pins, path)
+
+    def _decrement(self, counts: Dict[str, int], path: str):
+        count = counts.get(path, 0) - 1
+        if count > 0:
+            counts[path] = count
+        else:
+            counts.pop(path, None)
+        if path not in self._refcounts and path not in self._pins and self._manages(Path(path)):
+            self._delete(path)
+
+    def _manages(self, path: Path) -> bool:
+        """Whether this process may delete the blob at ``path``."""
+        if self._owns_guild is None:
+            return True
+        # Unpartitioned blobs may be used by another worker's messages
+        parts = path.relative_to(self.root).parts if path.is_relative_to(self.root) else ()
+        return len(parts) == 4 and parts[0] == "guilds" and parts[1].isdigit() and self._owns_guild(int(parts[1]))
+
+    def _delete(self, path: str):
+        try:
+            Path(path).unlink()
+            logger.debug(f"Removed unreferenced blob {path}")
+        except FileNotFoundError:
+            pass
+        except OSError as e:
+            logger.error(f"Error removing blob {path}: {e}")
+
+    def rebuild(self, messages: List[ScheduledMessage]):
+        """Recompute reference counts from the scheduled messages."""
+        self._refcounts = {}
+        for message in messages:
+            for file_info in message.files:
+                if file_info.get("sha256"):
+                    self.acquire(file_info["path"])
+
+    def _blob_files(self) -> Iterator[Path]:
+        if self._owns_guild is None:
+            yield from self.root.glob("??/*")
+        for guild_dir in self.root.glob("guilds/*"):
+            if self._owns_guild is None or (guild_dir.name.isdigit() and self._owns_guild(int(guild_dir.name))):
+                yield from guild_dir.glob("??/*")
+
+    def collect_garbage(self):
+        """Delete blobs on disk that no scheduled message references.
+
+        With a guild partition only the blobs of owned guilds are considered.
+        """
+        if not self.root.exists():
+            return
+        for path in self._blob_files():
+            if str(path) not in self._refcounts and str(path) not in self._pins:
+                try:
+                    path.unlink()
+                    logger.debug(f"Removed orphaned blob file {path}")
+                except OSError as e:
+                    logger.error(f"Error removing orphaned blob file {path}: {e}")
+
+    def on_schedule_change(self, event: str, message: Optional[ScheduledMessage]):
+        """Schedule listener keeping reference counts in sync."""
+        if event == "add":
+            for file_info in message.files:
+                if file_info.get("sha256"):
+                    self.acquire(file_info["path"])
+        elif event == "remove":
+            for file_info in message.files:
+                if file_info.get("sha256"):
+                    self.release(file_info["path"])
+                else:
+                    # Files saved before the blob store are owned by one message
+                    try:
+                        os.remove(file_info["path"])
+                        logger.debug(f"Cleaned up file: {file_info['path']}")
+                    except Exception as e:
+                        logger.error(f"Error removing file {file_info['path']}: {e}", exc_info=True)
+        elif event == "reload":
+            self.rebuild(schedule_manager.messages)
+            self.collect_garbage()
+
+
+blob_store = BlobStore()
+blob_store.rebuild(schedule_manager.messages)
+schedule_manager.add_listener(blob_store.on_schedule_change)
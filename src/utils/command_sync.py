@@ -0,0 +1,85 @@
+"""Syncing the app command tree only when it has changed."""
+
+import hashlib
+import json
+import os
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from discord import app_commands
+
+from .logger import get_logger
+
+logger = get_logger('command_sync')
+
+# Fingerprint of the last command tree synced to Discord
+COMMAND_FINGERPRINT_FILE = Path("data") / "command_tree.json"
+
+
+def command_tree_fingerprint(tree: app_commands.CommandTree) -> str:
+    """Hash the global command payloads that ``tree.sync()`` would upload.
+
+    Commands are ordered by type and name and keys are sorted, so the hash
+    only changes when what Discord would receive changes.
+    """
+    payload = sorted(
+        (command.to_dict(tree) for command in tree.get_commands()),
+        key=lambda command: (command.get("type", 1), command["name"])
+    )
+    encoded = json.dumps(payload, sort_keys=True, separators=(",", ":")).encode("utf-8")
+    return hashlib.sha256(encoded).hexdigest()
+
+
+def force_command_sync() -> bool:
+    """Whether to sync even if the tree is unchanged (``FORCE_COMMAND_SYNC``)."""
+    return os.getenv('FORCE_COMMAND_SYNC', 'false').lower() == 'true'
+
+
+def _read_fingerprint(path: Path) -> Dict[str, Any]:
+    try:
+        return json.loads(path.read_text())
+    except FileNotFoundError:
+        return {}
+    except (OSError, json.JSONDecodeError) as e:
+        logger.warning(f"Ignoring unreadable command fingerprint {path}: {e}")
+        return {}
+
+
+def _write_fingerprint(path: Path, record: Dict[str, Any]):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    temp_path = path.with_name(path.name + ".tmp")
+    temp_path.write_text(json.dumps(record, indent=2))
+    os.replace(temp_path, path)
+
+
+async def sync_commands(
+    tree: app_commands.CommandTree,
+    application_id: Optional[int],
+    force: Optional[bool] = None,
+    path: Path = COMMAND_FINGERPRINT_FILE
+) -> Optional[List[app_commands.AppCommand]]:
+    """Sync global commands unless they match the last synced fingerprint.
+
+    The fingerprint is stored per application, so switching to another
+    bot token syncs again. It is only recorded after a successful sync.
+
+    Args:
+        tree: The command tree to sync.
+        application_id: The application the commands belong to.
+        force: Sync regardless of the fingerprint; defaults to ``FORCE_COMMAND_SYNC``.
+        path: Where the last synced fingerprint is stored.
+
+    Returns:
+        list: The synced commands, or None if the sync was skipped.
+    """
+    if force is None:
+        force = force_command_sync()
+    fingerprint = command_tree_fingerprint(tree)
+    last = _read_fingerprint(path)
+    if not force and last.get("application_id") == application_id and last.get("fingerprint") == fingerprint:
+        logger.info(f"Command tree unchanged ({fingerprint[:12]}), skipping sync")
+        return None
+
+    synced = await tree.sync()
+    _write_fingerprint(path, {"application_id": application_id, "fingerprint": fingerprint})
+    return synced
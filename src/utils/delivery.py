@@ -0,0 +1,298 @@
+"""Rate-limited, concurrent message delivery with bounded fan-out."""
+
+import asyncio
+import os
+import time
+from collections import deque
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Sequence, Tuple
+
+import discord
+
+from .logger import get_logger
+from .metrics import (
+    delivery_queue_depth,
+    rate_limit_wait_seconds,
+    rate_limit_waits,
+    send_failures,
+    send_latency
+)
+from .tracing import span
+
+logger = get_logger('delivery')
+
+DEFAULT_MAX_CONCURRENT_SENDS = 25
+DEFAULT_MAX_GUILD_CONCURRENT_SENDS = 10
+# Discord allows 50 requests per second per bot and 5 messages per 5 seconds
+# per channel
+DEFAULT_GLOBAL_SENDS_PER_SECOND = 50
+DEFAULT_CHANNEL_SENDS_PER_5_SECONDS = 5
+# Seconds added to each rate limit window so sends that reach Discord a
+# little later than they left still land in the right window
+RATE_LIMIT_MARGIN = 0.05
+# Idle channel entries are swept once there are this many of them
+CHANNEL_SWEEP_THRESHOLD = 1024
+
+
+class SlidingWindow:
+    """Rate limiter that allows at most ``limit`` sends in any ``window`` seconds.
+
+    It remembers the start times of the last ``limit`` sends. ``reserve``
+    books the earliest start that keeps every window within the limit,
+    which is one window after the send ``limit`` places back, and returns
+    how long the caller has to wait for it. Callers are served in the
+    order they reserve without holding a lock while they wait. Unlike a
+    token bucket, bursts never exceed the limit, whether Discord's window
+    starts at the first send or at any later moment.
+    """
+
+    def __init__(self, limit: int, window: float):
+        self.limit = limit
+        self.window = window
+        self._starts: deque = deque(maxlen=limit)
+
+    def reserve(self) -> float:
+        """Book the next send and return the seconds until it may start."""
+        now = time.monotonic()
+        start = now
+        if len(self._starts) == self.limit:
+            start = max(now, self._starts[0] + self.window)
+        self._starts.append(start)
+        return start - now
+
+    def is_idle(self) -> bool:
+        """Whether no booked send is still inside the window."""
+        return not self._starts or self._starts[-1] + self.window <= time.monotonic()
+
+    async def acquire(self) -> float:
+        """Wait for a send slot.
+
+        Returns:
+            float: Seconds spent waiting.
+        """
+        delay = self.reserve()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        return delay
+
+
+class DeliveryEngine:
+    """Central dispatcher for outbound messages.
+
+    Every send queues on a per-channel lock, then waits for the channel's
+    rate limit window, the per-guild semaphore, the global rate limit
+    window and the process-wide semaphore. The channel lock is acquired
+    first and asyncio locks are FIFO, so sends to the same channel go out in
+    the order they were submitted while different channels proceed in
+    parallel. The windows pace sends to Discord's route limits up front, so
+    bursts wait in the queue instead of running into 429 responses.
+
+    Limits left as None are read from the ``MAX_CONCURRENT_SENDS``,
+    ``MAX_GUILD_CONCURRENT_SENDS``, ``GLOBAL_SENDS_PER_SECOND`` and
+    ``CHANNEL_SENDS_PER_5_SECONDS`` environment variables on first use, so
+    values from ``.env`` apply even though the engine is created at import.
+    Discord's global rate limit is per bot, so each of ``workers`` cluster
+    processes gets an equal share of the global rate and of
+    ``MAX_CONCURRENT_SENDS``; guilds and channels belong to one worker, so
+    their limits are not divided.
+    """
+
+    def __init__(
+        self,
+        max_concurrency: Optional[int] = None,
+        max_guild_concurrency: Optional[int] = None,
+        global_rate: Optional[float] = None,
+        channel_rate: Optional[float] = None,
+        workers: int = 1
+    ):
+        self.max_concurrency = max_concurrency
+        self.max_guild_concurrency = max_guild_concurrency
+        self.global_rate = global_rate
+        self.channel_rate = channel_rate
+        self.workers = workers
+        self._global_limit: Optional[asyncio.Semaphore] = None
+        self._global_window: Optional[SlidingWindow] = None
+        self._guild_limits: Dict[int, asyncio.Semaphore] = {}
+        self._channel_locks: Dict[int, List] = {}
+        self._sweep_at = CHANNEL_SWEEP_THRESHOLD
+        self._queued = 0
+
+    def _resolve_limits(self):
+        if self.max_concurrency is None:
+            self.max_concurrency = max(
+                1, int(os.getenv('MAX_CONCURRENT_SENDS', DEFAULT_MAX_CONCURRENT_SENDS)) // self.workers
+            )
+        if self.max_guild_concurrency is None:
+            self.max_guild_concurrency = int(
+                os.getenv('MAX_GUILD_CONCURRENT_SENDS', DEFAULT_MAX_GUILD_CONCURRENT_SENDS)
+            )
+        if self.global_rate is None:
+            self.global_rate = float(
+                os.getenv('GLOBAL_SENDS_PER_SECOND', DEFAULT_GLOBAL_SENDS_PER_SECOND)
+            ) / self.workers
+        if self.channel_rate is None:
+            self.channel_rate = float(
+                os.getenv('CHANNEL_SENDS_PER_5_SECONDS', DEFAULT_CHANNEL_SENDS_PER_5_SECONDS)
+            )
+        self._global_limit = asyncio.Semaphore(max(1, self.max_concurrency))
+        self._global_window = SlidingWindow(max(1, int(self.global_rate)), 1.0 + RATE_LIMIT_MARGIN)
+
+    @property
+    def queue_depth(self) -> int:
+        """Number of sends queued or in flight."""
+        return self._queued
+
+    def channel_queue_depth(self, channel_id: int) -> int:
+        """Number of sends queued or in flight for one channel."""
+        entry = self._channel_locks.get(channel_id)
+        return entry[1] if entry else 0
+
+    def _guild_limit(self, guild_id: int) -> asyncio.Semaphore:
+        limit = self._guild_limits.get(guild_id)
+        if limit is None:
+            limit = self._guild_limits[guild_id] = asyncio.Semaphore(max(1, self.max_guild_concurrency))
+        return limit
+
+    def _acquire_channel_entry(self, channel_id: int) -> List:
+        # Entries are [lock, users, window] so idle channels can be dropped
+        # again once their window has passed
+        entry = self._channel_locks.get(channel_id)
+        if entry is None:
+            if len(self._channel_locks) >= self._sweep_at:
+                self._sweep_channels()
+            entry = self._channel_locks[channel_id] = [
+                asyncio.Lock(), 0, SlidingWindow(max(1, int(self.channel_rate)), 5.0 + RATE_LIMIT_MARGIN)
+            ]
+        entry[1] += 1
+        return entry
+
+    def _release_channel_entry(self, channel_id: int, entry: List):
+        entry[1] -= 1
+        if entry[1] == 0 and entry[2].is_idle() and self._channel_locks.get(channel_id) is entry:
+            del self._channel_locks[channel_id]
+
+    def _sweep_channels(self):
+        self._channel_locks = {
+            channel_id: entry for channel_id, entry in self._channel_locks.items()
+            if entry[1] or not entry[2].is_idle()
+        }
+        self._sweep_at = max(CHANNEL_SWEEP_THRESHOLD, 2 * len(self._channel_locks))
+
+    @staticmethod
+    async def _wait_for_slot(window: SlidingWindow, name: str):
+        waited = await window.acquire()
+        if waited:
+            rate_limit_waits.inc(bucket=name)
+            rate_limit_wait_seconds.inc(waited, bucket=name)
+
+    async def send(self, channel: discord.abc.Messageable, *, path: str = "other", **kwargs) -> discord.Message:
+        """Send a message to a channel within the concurrency limits.
+
+        Args:
+            channel: The channel to send to.
+            path: Name of the sending feature, used to label metrics.
+            **kwargs: Arguments forwarded to ``channel.send``.
+
+        Returns:
+            discord.Message: The message that was sent.
+        """
+        if self._global_limit is None:
+            self._resolve_limits()
+        entry = self._acquire_channel_entry(channel.id)
+        self._queued += 1
+        start = time.perf_counter()
+        try:
+            with span("delivery.send", path=path, channel_id=channel.id) as send_span:
+                async with entry[0]:
+                    await self._wait_for_slot(entry[2], "channel")
+                    guild = getattr(channel, "guild", None)
+                    async with self._guild_limit(guild.id if guild else 0):
+                        await self._wait_for_slot(self._global_window, "global")
+                        async with self._global_limit:
+                            if send_span is not None:
+                                send_span.set_attribute("queued_ms", round((time.perf_counter() - start) * 1000, 3))
+                            with span("discord.send"):
+                                message = await channel.send(**kwargs)
+            send_latency.observe(time.perf_counter() - start, path=path)
+            return message
+        except Exception:
+            send_failures.inc(path=path, channel_id=channel.id)
+            raise
+        finally:
+            self._queued -= 1
+            self._release_channel_entry(channel.id, entry)
+
+
+delivery_engine = DeliveryEngine()
+delivery_queue_depth.set_function(lambda: delivery_engine.queue_depth)
+
+
+def attachment_links_enabled() -> bool:
+    """Whether attachments are uploaded once and linked in other channels.
+
+    Controlled by ``ATTACHMENT_DELIVERY_MODE`` (``upload`` or ``link``).
+    """
+    return os.getenv('ATTACHMENT_DELIVERY_MODE', 'upload').lower() == 'link'
+
+
+def get_staging_channel_id() -> Optional[int]:
+    """Channel that receives the single upload in link mode, if configured."""
+    channel_id = os.getenv('ATTACHMENT_STAGING_CHANNEL_ID')
+    return int(channel_id) if channel_id else None
+
+
+def append_attachment_links(content: Optional[str], urls: List[str]) -> str:
+    """Append attachment URLs to message content."""
+    return "\n".join([content, *urls] if content else urls)
+
+
+SendOne = Callable[[int, Optional[List[str]]], Awaitable[Tuple[Any, ...]]]
+
+
+async def broadcast(
+    channel_ids: Sequence[int],
+    send_one: SendOne,
+    link_attachments: bool = False,
+    staging_channel: Optional[discord.abc.Messageable] = None,
+    make_files: Optional[Callable[[], List[discord.File]]] = None,
+    path: str = "other"
+) -> List[Tuple[Any, ...]]:
+    """Send to every channel concurrently, optionally uploading files once.
+
+    ``send_one(channel_id, attachment_urls)`` performs one send and returns
+    a tuple whose last element is the sent ``discord.Message`` (or None).
+    When ``attachment_urls`` is not None the callee must post those links
+    instead of uploading the files again.
+
+    With ``link_attachments`` the files are uploaded once, to the staging
+    channel when one is given, otherwise to the first target channel that
+    accepts them; all remaining channels then receive the attachment URLs.
+    Linked channels are only sent to after that upload completes. ``path``
+    labels the metrics of the staging upload.
+
+    Returns:
+        List of ``send_one`` results in the order of ``channel_ids``.
+    """
+    results: Dict[int, Tuple[Any, ...]] = {}
+    remaining = list(enumerate(channel_ids))
+    urls = None
+
+    if link_attachments:
+        if staging_channel is not None and make_files is not None:
+            try:
+                staged = await delivery_engine.send(staging_channel, path=path, files=make_files())
+                urls = [attachment.url for attachment in staged.attachments] or None
+            except Exception as e:
+                logger.error(f"Error uploading attachments to staging channel: {e}", exc_info=True)
+
+        while urls is None and remaining:
+            index, channel_id = remaining.pop(0)
+            result = await send_one(channel_id, None)
+            results[index] = result
+            message = result[-1]
+            if message is not None and message.attachments:
+                urls = [attachment.url for attachment in message.attachments]
+
+    sent = await asyncio.gather(*(send_one(channel_id, urls) for _, channel_id in remaining))
+    for (index, _), result in zip(remaining, sent):
+        results[index] = result
+    return [results[index] for index in range(len(channel_ids))]
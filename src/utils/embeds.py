@@ -1,4 +1,5 @@
 import discord
+from typing import Any, Dict, List
 
 def create_help_embed():
     help_embed = discord.Embed(
@@ -38,6 +39,82 @@ def create_help_embed():
         inline=False
     )
 
+    help_embed.add_field(
+        name="/traces (administrators)",
+        value=(
+            "Show timings of recent commands and deliveries.\n"
+            "• Optional: Give a trace ID to see its individual steps"
+        ),
+        inline=False
+    )
+
     help_embed.set_footer(text="All interactions with the bot are private - other users won't see you using the commands.")
     
     return help_embed
+
+
+def _trace_summary(trace: Dict[str, Any]) -> str:
+    failed = any("error" in span for span in trace["spans"])
+    return (
+        f"`{trace['trace_id'][:8]}` **{trace['name']}** {trace['duration_ms']:.1f} ms"
+        f" · {len(trace['spans'])} spans · <t:{int(trace['start'])}:R>{' ❌' if failed else ''}"
+    )
+
+
+def _span_lines(trace: Dict[str, Any]) -> List[str]:
+    """One line per span in start order, indented by nesting depth."""
+    parents = {span["span_id"]: span["parent_id"] for span in trace["spans"]}
+    lines = []
+    for span in sorted(trace["spans"], key=lambda span: span["start"]):
+        depth = 0
+        parent_id = span["parent_id"]
+        while parent_id is not None:
+            depth += 1
+            parent_id = parents.get(parent_id)
+        error = f" ❌ {span['error'][:60]}" if "error" in span else ""
+        lines.append(f"`{span['duration_ms']:>9.1f} ms` {'  ' * depth}{span['name']}{error}")
+    return lines
+
+
+def create_traces_embed(traces: List[Dict[str, Any]]):
+    traces_embed = discord.Embed(
+        title="Recent Traces",
+        description="\n".join(_trace_summary(trace) for trace in traces)[:4096] or "No traces recorded yet.",
+        color=discord.Color.blue()
+    )
+    traces_embed.set_footer(text="Use /traces trace_id:<id> to see the steps of one trace.")
+    return traces_embed
+
+
+def create_trace_embed(trace_id: str, traces: List[Dict[str, Any]]):
+    title = f"Trace {trace_id}"
+    trace_embed = discord.Embed(
+        title=title,
+        color=discord.Color.blue()
+    )
+    # Discord rejects embeds over 6000 characters in total; keep room for the footer
+    budget = 6000 - len(title) - 50
+    # A command, its view interactions and its modal are recorded separately
+    shown = traces[-25:]
+    hidden = sum(len(trace["spans"]) for trace in traces[:-25])
+    for index, trace in enumerate(shown):
+        name = f"{trace['name']} ({trace['duration_ms']:.1f} ms)"
+        room = min(1024, budget - len(name))
+        lines = _span_lines(trace)
+        value = ""
+        for line in lines:
+            if len(value) + len(line) + 1 > room:
+                break
+            value += line + "\n"
+        if not value:
+            if lines or room < len("No spans"):
+                # Out of room for this trace and the ones after it
+                hidden += sum(len(later["spans"]) for later in shown[index:])
+                break
+            value = "No spans"
+        hidden += len(lines) - value.count("\n")
+        budget -= len(name) + len(value)
+        trace_embed.add_field(name=name, value=value, inline=False)
+    if hidden:
+        trace_embed.set_footer(text=f"…{hidden} more span{'s' if hidden != 1 else ''} truncated")
+    return trace_embed
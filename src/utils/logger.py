@@ -1,32 +1,122 @@
 """Logging configuration for the Reverb bot."""
 
+import atexit
+import json
 import logging
+import logging.handlers
 import os
-from datetime import datetime
+import queue
+import threading
+import time
+from datetime import datetime, timezone
 from pathlib import Path
+from typing import Dict, Optional, Tuple
 
 # Create logs directory if it doesn't exist
 LOGS_DIR = Path("logs")
 LOGS_DIR.mkdir(exist_ok=True)
 
-# Create a new log file for each session
-LOG_FILE = LOGS_DIR / f"reverb_{datetime.now().strftime('%Y%m%d_%H%M%S')}.log"
+# One log file that is rotated by size or time
+LOG_FILE = LOGS_DIR / "reverb.log"
+
+DEFAULT_LOG_MAX_BYTES = 10 * 1024 * 1024
+DEFAULT_LOG_BACKUP_COUNT = 5
+# Identical debug messages from one logger are written at most once per interval
+DEFAULT_LOG_RATE_LIMIT_SECONDS = 60
+
+_listener: Optional[logging.handlers.QueueListener] = None
+
+
+class JsonFormatter(logging.Formatter):
+    """Formats records as one JSON object per line."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "time": datetime.fromtimestamp(record.created, timezone.utc).isoformat(),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage()
+        }
+        if record.exc_info:
+            entry["exception"] = self.formatException(record.exc_info)
+        return json.dumps(entry)
+
+
+class RateLimitFilter(logging.Filter):
+    """Drops repeats of the same debug message within ``interval`` seconds.
+
+    Debug records such as the scheduler's per-tick messages are keyed by
+    logger and message; the next one let through notes how many repeats
+    were dropped. Records at INFO and above always pass.
+    """
+
+    def __init__(self, interval: float):
+        super().__init__()
+        self.interval = interval
+        self._seen: Dict[Tuple[str, str], Tuple[float, int]] = {}
+        self._lock = threading.Lock()
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno > logging.DEBUG:
+            return True
+        key = (record.name, record.getMessage())
+        now = time.monotonic()
+        with self._lock:
+            last, suppressed = self._seen.get(key, (None, 0))
+            if last is not None and now - last < self.interval:
+                self._seen[key] = (last, suppressed + 1)
+                return False
+            self._seen[key] = (now, 0)
+            if len(self._seen) > 1024:
+                self._seen = {k: v for k, v in self._seen.items() if now - v[0] < self.interval}
+        if suppressed:
+            record.msg = f"{record.getMessage()} (repeated {suppressed} more times)"
+            record.args = None
+        return True
+
+
+def _file_handler(log_file: Path) -> logging.Handler:
+    backup_count = int(os.getenv('LOG_BACKUP_COUNT', DEFAULT_LOG_BACKUP_COUNT))
+    if os.getenv('LOG_ROTATION', 'size').lower() == 'time':
+        return logging.handlers.TimedRotatingFileHandler(
+            log_file,
+            when=os.getenv('LOG_ROTATE_WHEN', 'midnight'),
+            backupCount=backup_count,
+            encoding='utf-8'
+        )
+    return logging.handlers.RotatingFileHandler(
+        log_file,
+        maxBytes=int(os.getenv('LOG_MAX_BYTES', DEFAULT_LOG_MAX_BYTES)),
+        backupCount=backup_count,
+        encoding='utf-8'
+    )
+
 
 # Configure logging
-def setup_logger(debug_mode: bool = False):
+def setup_logger(debug_mode: bool = False, log_file: Path = LOG_FILE):
     """Set up the logger with appropriate configuration.
-    
+
+    Records are put on a queue by the calling thread and written to the
+    console and the rotating log file by a background listener thread, so
+    logging never blocks the event loop on I/O.
+
     Args:
         debug_mode: If True, sets logging level to DEBUG, otherwise INFO
+        log_file: The file to write, one per process since rotation is not shared
     """
+    global _listener
+
     # Create formatter
-    formatter = logging.Formatter(
-        '%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-        datefmt='%Y-%m-%d %H:%M:%S'
-    )
+    if os.getenv('LOG_FORMAT', 'text').lower() == 'json':
+        formatter = JsonFormatter()
+    else:
+        formatter = logging.Formatter(
+            '%(asctime)s - %(name)s - %(levelname)s - %(message)s',
+            datefmt='%Y-%m-%d %H:%M:%S'
+        )
 
     # Configure file handler
-    file_handler = logging.FileHandler(LOG_FILE)
+    file_handler = _file_handler(log_file)
     file_handler.setFormatter(formatter)
 
     # Configure console handler
@@ -37,25 +127,47 @@ def setup_logger(debug_mode: bool = False):
     logger = logging.getLogger('reverb')
     logger.setLevel(logging.DEBUG if debug_mode else logging.INFO)
 
-    # Add handlers
-    logger.addHandler(file_handler)
-    logger.addHandler(console_handler)
+    # Replace handlers from an earlier call
+    shutdown_logger()
+    for handler in logger.handlers[:]:
+        logger.removeHandler(handler)
+
+    # Hand records to the background listener
+    log_queue = queue.SimpleQueue()
+    queue_handler = logging.handlers.QueueHandler(log_queue)
+    queue_handler.addFilter(
+        RateLimitFilter(float(os.getenv('LOG_RATE_LIMIT_SECONDS', DEFAULT_LOG_RATE_LIMIT_SECONDS)))
+    )
+    logger.addHandler(queue_handler)
+    _listener = logging.handlers.QueueListener(log_queue, file_handler, console_handler)
+    _listener.start()
 
     # Log startup information
     logger.info("=" * 50)
     logger.info("Reverb Bot Starting")
-    logger.info(f"Log file: {LOG_FILE}")
+    logger.info(f"Log file: {log_file}")
     logger.info(f"Debug mode: {debug_mode}")
     logger.info("=" * 50)
 
     return logger
 
+def shutdown_logger():
+    """Write out queued records and stop the background listener."""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        for handler in _listener.handlers:
+            handler.close()
+        _listener = None
+
+atexit.register(shutdown_logger)
+
 def get_logger(name: str = None) -> logging.Logger:
     """Get a logger instance.
-    
+
     Args:
         name: The name of the logger (will be prefixed with 'reverb.')
-    
+
     Returns:
         A Logger instance
     """
@@ -0,0 +1,260 @@
+"""In-process metrics exposed in the Prometheus text format."""
+
+import math
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+
+from aiohttp import web
+
+from .logger import get_logger
+
+logger = get_logger('metrics')
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 300)
+
+LabelValues = Tuple[str, ...]
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_value(value: float) -> str:
+    if value == math.inf:
+        return "+Inf"
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+class Metric:
+    """Base class for metrics with optional labels."""
+
+    kind = "untyped"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+
+    def _key(self, labels: Dict[str, object]) -> LabelValues:
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def _samples(self) -> List[str]:
+        raise NotImplementedError
+
+    def render(self) -> str:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        lines.extend(self._samples())
+        return "\n".join(lines)
+
+
+class Counter(Metric):
+    """A value that only goes up."""
+
+    kind = "counter"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[LabelValues, float] = {}
+
+    def inc(self, amount: float = 1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels) -> float:
+        return self._values.get(self._key(labels), 0)
+
+    def _samples(self) -> List[str]:
+        with self._lock:
+            values = list(self._values.items())
+        return [
+            f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}"
+            for key, value in values
+        ]
+
+
+class Gauge(Metric):
+    """A value that can go up and down, or is read from a function."""
+
+    kind = "gauge"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[LabelValues, float] = {}
+        self._function: Optional[Callable[[], float]] = None
+
+    def set(self, value: float, **labels):
+        with self._lock:
+            self._values[self._key(labels)] = value
+
+    def set_function(self, function: Callable[[], float]):
+        """Read the (unlabelled) value from ``function`` at scrape time."""
+        self._function = function
+
+    def _samples(self) -> List[str]:
+        if self._function is not None:
+            return [f"{self.name} {_format_value(self._function())}"]
+        with self._lock:
+            values = list(self._values.items())
+        return [
+            f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}"
+            for key, value in values
+        ]
+
+
+class Histogram(Metric):
+    """Counts observations in cumulative buckets."""
+
+    kind = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS
+    ):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets)) + (math.inf,)
+        # Per label set: [bucket counts..., sum, count]
+        self._values: Dict[LabelValues, List[float]] = {}
+
+    def observe(self, value: float, **labels):
+        key = self._key(labels)
+        with self._lock:
+            entry = self._values.get(key)
+            if entry is None:
+                entry = self._values[key] = [0] * (len(self.buckets) + 2)
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    entry[i] += 1
+                    break
+            entry[-2] += value
+            entry[-1] += 1
+
+    @contextmanager
+    def timer(self, **labels) -> Iterator[None]:
+        """Observe the time taken by the ``with`` block."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    def count(self, **labels) -> int:
+        entry = self._values.get(self._key(labels))
+        return int(entry[-1]) if entry else 0
+
+    def _samples(self) -> List[str]:
+        with self._lock:
+            values = [(key, list(entry)) for key, entry in self._values.items()]
+        lines = []
+        for key, entry in values:
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets, entry):
+                cumulative += bucket_count
+                labels = _format_labels(self.labelnames, key, f'le="{_format_value(bound)}"')
+                lines.append(f"{self.name}_bucket{labels} {_format_value(cumulative)}")
+            labels = _format_labels(self.labelnames, key)
+            lines.append(f"{self.name}_sum{labels} {_format_value(entry[-2])}")
+            lines.append(f"{self.name}_count{labels} {_format_value(entry[-1])}")
+        return lines
+
+
+class MetricsRegistry:
+    """Holds metrics and renders them for scraping."""
+
+    def __init__(self):
+        self._metrics: Dict[str, Metric] = {}
+
+    def register(self, metric: Metric) -> Metric:
+        if metric.name in self._metrics:
+            raise ValueError(f"Metric {metric.name} is already registered")
+        self._metrics[metric.name] = metric
+        return metric
+
+    def render(self) -> str:
+        """Render every metric in the Prometheus text exposition format."""
+        return "\n".join(metric.render() for metric in self._metrics.values()) + "\n"
+
+
+registry = MetricsRegistry()
+
+send_latency = registry.register(Histogram(
+    "reverb_send_latency_seconds",
+    "Time from submitting a send to Discord accepting it, including queueing.",
+    ["path"]
+))
+send_failures = registry.register(Counter(
+    "reverb_send_failures_total",
+    "Sends that failed, by path and channel.",
+    ["path", "channel_id"]
+))
+rate_limit_waits = registry.register(Counter(
+    "reverb_rate_limit_waits_total",
+    "Sends that waited for a rate limit token, by bucket.",
+    ["bucket"]
+))
+rate_limit_wait_seconds = registry.register(Counter(
+    "reverb_rate_limit_wait_seconds_total",
+    "Total time sends spent waiting for rate limit tokens, by bucket.",
+    ["bucket"]
+))
+delivery_queue_depth = registry.register(Gauge(
+    "reverb_delivery_queue_depth",
+    "Sends queued or in flight in the delivery engine."
+))
+scheduled_messages_pending = registry.register(Gauge(
+    "reverb_scheduled_messages_pending",
+    "Scheduled messages waiting to be delivered."
+))
+scheduler_lag = registry.register(Histogram(
+    "reverb_scheduler_lag_seconds",
+    "How long after its due time a scheduled message started delivery."
+))
+storage_write_seconds = registry.register(Histogram(
+    "reverb_storage_write_seconds",
+    "Time spent writing schedule storage, by backend and operation.",
+    ["backend", "operation"]
+))
+
+
+async def start_metrics_server(port: Optional[int] = None, host: Optional[str] = None) -> Optional[web.AppRunner]:
+    """Serve ``/metrics`` over HTTP if a port is configured.
+
+    The port and host default to ``METRICS_PORT`` and ``METRICS_HOST``
+    (``127.0.0.1``). Without a port no server is started.
+
+    Returns:
+        web.AppRunner: The running server, to be passed to ``cleanup()``, or None.
+    """
+    if port is None:
+        port = os.getenv('METRICS_PORT')
+        if not port:
+            return None
+    host = host or os.getenv('METRICS_HOST', '127.0.0.1')
+
+    async def handle_metrics(request: web.Request) -> web.Response:
+        return web.Response(
+            body=registry.render().encode("utf-8"),
+            headers={"Content-Type": "text/plain; version=0.0.4; charset=utf-8"}
+        )
+
+    app = web.Application()
+    app.router.add_get("/metrics", handle_metrics)
+    runner = web.AppRunner(app, access_log=None)
+    await runner.setup()
+    await web.TCPSite(runner, host, int(port)).start()
+    logger.info(f"Serving metrics on http://{host}:{port}/metrics")
+    return runner
@@ -0,0 +1,68 @@
+"""Cache of the channels each member may post in."""
+
+from typing import Dict, Hashable, Tuple
+
+import discord
+
+from .logger import get_logger
+
+logger = get_logger('permissions')
+
+
+class ChannelPermissionCache:
+    """Caches the postable text channels per guild and member.
+
+    Entries are dropped for a whole guild when its channels, roles or owner
+    change, and for a single member when their roles change. Each entry also
+    stores a fingerprint of the member's roles, owner status and whether
+    they are timed out, taken from the interaction, so a change whose
+    gateway event the bot did not receive (member events need the members
+    intent) or an expired timeout still recomputes.
+    """
+
+    def __init__(self):
+        self._guilds: Dict[int, Dict[int, Tuple[Hashable, Dict[str, int]]]] = {}
+
+    @staticmethod
+    def _fingerprint(member: discord.Member) -> Hashable:
+        return (
+            tuple(role.id for role in member.roles),
+            member.guild.owner_id == member.id,
+            # Not the end time: an expired timeout must change the fingerprint
+            member.is_timed_out()
+        )
+
+    @staticmethod
+    def _compute(member: discord.Member) -> Dict[str, int]:
+        return {
+            channel.name: channel.id
+            for channel in member.guild.channels
+            if isinstance(channel, discord.TextChannel) and
+            channel.permissions_for(member).send_messages
+        }
+
+    def get(self, member: discord.Member) -> Dict[str, int]:
+        """Get the channels a member can post in, keyed by channel name.
+
+        The returned dict is shared with the cache and must not be modified.
+        """
+        members = self._guilds.setdefault(member.guild.id, {})
+        fingerprint = self._fingerprint(member)
+        entry = members.get(member.id)
+        if entry is None or entry[0] != fingerprint:
+            entry = members[member.id] = (fingerprint, self._compute(member))
+        return entry[1]
+
+    def invalidate_guild(self, guild_id: int):
+        """Drop every cached entry for a guild."""
+        if self._guilds.pop(guild_id, None):
+            logger.debug(f"Invalidated channel permission cache for guild {guild_id}")
+
+    def invalidate_member(self, guild_id: int, member_id: int):
+        """Drop the cached entry for one member of a guild."""
+        members = self._guilds.get(guild_id)
+        if members and members.pop(member_id, None):
+            logger.debug(f"Invalidated channel permission cache for member {member_id} in guild {guild_id}")
+
+
+channel_permission_cache = ChannelPermissionCache()
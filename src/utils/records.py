@@ -0,0 +1,94 @@
+"""Typed records for scheduled messages."""
+
+import sys
+import uuid
+from array import array
+from datetime import datetime
+from typing import Any, Dict, Iterable, List, Optional, Union
+
+
+class ScheduledMessage:
+    """A message waiting to be delivered.
+
+    Records use ``__slots__`` and keep channel IDs in signed 64-bit arrays,
+    so a pending message costs far less memory than the equivalent dict.
+    The due time is stored as an epoch timestamp and sender names are
+    interned, since the same few staff members schedule most messages.
+    Each record has a stable unique ``id`` that is persisted with it.
+    Records compare by identity; storage backends convert them to and
+    from plain dicts with ``to_dict`` and ``from_dict``.
+    """
+
+    __slots__ = (
+        "id",
+        "due_at",
+        "channel_ids",
+        "content",
+        "files",
+        "sender_name",
+        "guild_id",
+        "completed_channel_ids"
+    )
+
+    def __init__(
+        self,
+        due_at: float,
+        channel_ids: Iterable[int],
+        content: Optional[str],
+        sender_name: str,
+        files: Optional[List[Dict[str, str]]] = None,
+        guild_id: Optional[int] = None,
+        completed_channel_ids: Iterable[int] = (),
+        message_id: Optional[str] = None
+    ):
+        self.id = message_id or uuid.uuid4().hex
+        self.due_at = due_at
+        self.channel_ids = array("q", channel_ids)
+        self.content = content
+        self.sender_name = sys.intern(sender_name)
+        self.files = files or []
+        self.guild_id = guild_id
+        self.completed_channel_ids = array("q", completed_channel_ids)
+
+    @property
+    def timestamp(self) -> str:
+        """The due time as a local ISO 8601 string, as stored on disk."""
+        return datetime.fromtimestamp(self.due_at).isoformat()
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "ScheduledMessage":
+        return cls(
+            due_at=datetime.fromisoformat(data["timestamp"]).timestamp(),
+            channel_ids=data["channel_ids"],
+            content=data.get("content"),
+            sender_name=data["sender_name"],
+            files=data.get("files"),
+            guild_id=data.get("guild_id"),
+            completed_channel_ids=data.get("completed_channel_ids", ()),
+            message_id=data.get("id")
+        )
+
+    @classmethod
+    def coerce(cls, message: Union["ScheduledMessage", Dict[str, Any]]) -> "ScheduledMessage":
+        """Return ``message`` as a record, converting legacy dicts."""
+        return message if isinstance(message, cls) else cls.from_dict(message)
+
+    def to_dict(self) -> Dict[str, Any]:
+        data = {
+            "id": self.id,
+            "channel_ids": self.channel_ids.tolist(),
+            "content": self.content,
+            "files": self.files,
+            "timestamp": self.timestamp,
+            "sender_name": self.sender_name,
+            "guild_id": self.guild_id
+        }
+        if self.completed_channel_ids:
+            data["completed_channel_ids"] = self.completed_channel_ids.tolist()
+        return data
+
+    def __repr__(self) -> str:
+        return (
+            f"ScheduledMessage(id={self.id!r}, timestamp={self.timestamp!r}, "
+            f"channels={len(self.channel_ids)}, sender_name={self.sender_name!r})"
+        )
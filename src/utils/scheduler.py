@@ -1,105 +1,226 @@
 import asyncio
+import heapq
+import itertools
 import os
-from datetime import datetime
+import time
+from typing import Dict, Iterator, List, Optional, Set, Tuple
 
 import discord
 
+from .delivery import (
+    append_attachment_links,
+    attachment_links_enabled,
+    broadcast,
+    delivery_engine,
+    get_staging_channel_id
+)
 from .logger import get_logger
+from .metrics import scheduler_lag, send_failures
+from .records import ScheduledMessage
+from .tracing import span
 
 logger = get_logger('scheduler')
 
+# Upper bound on a single sleep so wall-clock adjustments are picked up
+MAX_SLEEP_SECONDS = 60
+# Delay before retrying a message whose processing raised unexpectedly
+RETRY_DELAY_SECONDS = 60
+# Discord limits that bound how many scheduled messages can be merged
+MAX_MESSAGE_LENGTH = 2000
+MAX_FILES_PER_MESSAGE = 10
+COALESCE_SEPARATOR = "\n\n"
+
+
+def coalescing_enabled() -> bool:
+    """Whether co-due messages to a channel are merged into fewer sends.
+
+    Controlled by ``COALESCE_SCHEDULED_MESSAGES`` (``true`` or ``false``).
+    """
+    return os.getenv('COALESCE_SCHEDULED_MESSAGES', 'false').lower() == 'true'
+
+
 class ScheduleRunner:
+    """Delivers scheduled messages when they become due.
+
+    Pending messages are kept in a min-heap ordered by due time, so the
+    runner sleeps until the next deadline instead of polling. Storage
+    changes wake the runner immediately through a schedule listener.
+    Removed or rescheduled messages are dropped lazily when their stale heap
+    entries reach the top. Each delivery runs as its own task, so a slow
+    broadcast does not hold back messages that fall due meanwhile.
+    """
+
     def __init__(self, bot):
         self.bot = bot
         self._task = None
+        self._heap: List[Tuple[float, int, ScheduledMessage]] = []
+        # Heap counter of the live entry for each pending message ID
+        self._pending: Dict[str, int] = {}
+        self._counter = itertools.count()
+        self._wakeup = asyncio.Event()
+        # Messages being delivered by ID, and the tasks delivering them
+        self._in_flight: Dict[str, ScheduledMessage] = {}
+        self._tasks: Set[asyncio.Task] = set()
+        # Messages that fell due again while still being delivered
+        self._deferred: Dict[str, ScheduledMessage] = {}
         logger.info("Scheduler initialized")
 
     async def start(self):
         if self._task is None:
+            from .storage import schedule_manager
+
             logger.info("Starting scheduler task")
+            schedule_manager.add_listener(self._on_schedule_change)
+            self._rebuild(schedule_manager.messages)
             self._task = self.bot.loop.create_task(self._run())
         else:
             logger.debug("Scheduler task already running")
 
     async def stop(self):
         if self._task is not None:
+            from .storage import schedule_manager
+
             logger.info("Stopping scheduler task")
+            schedule_manager.remove_listener(self._on_schedule_change)
             self._task.cancel()
             self._task = None
+            tasks = list(self._tasks)
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            self._in_flight = {}
+            self._deferred = {}
         else:
             logger.debug("No scheduler task to stop")
 
-    async def _run(self):
+    def _on_schedule_change(self, event: str, message: Optional[ScheduledMessage]):
+        """Keep the heap in sync with storage and wake the run loop."""
+        if event in ("add", "update"):
+            self._push(message)
+        elif event == "remove":
+            self._pending.pop(message.id, None)
+            self._deferred.pop(message.id, None)
+        elif event == "reload":
+            from .storage import schedule_manager
+
+            self._deferred = {}
+            self._rebuild(schedule_manager.messages)
+        self._wakeup.set()
+
+    def _push(self, message: ScheduledMessage, due_at: Optional[float] = None):
+        if due_at is None:
+            due_at = message.due_at
+        count = next(self._counter)
+        heapq.heappush(self._heap, (due_at, count, message))
+        self._pending[message.id] = count
+
+    def _is_live(self, entry: Tuple[float, int, ScheduledMessage]) -> bool:
+        return self._pending.get(entry[2].id) == entry[1]
+
+    def _rebuild(self, messages: List[ScheduledMessage]):
+        self._heap = []
+        self._pending = {}
+        for message in messages:
+            self._push(message)
+
+    def _discard_stale(self):
+        """Drop heap entries for messages that are no longer scheduled."""
+        while self._heap and not self._is_live(self._heap[0]):
+            heapq.heappop(self._heap)
+        if len(self._heap) > 2 * len(self._pending) + 64:
+            self._heap = [entry for entry in self._heap if self._is_live(entry)]
+            heapq.heapify(self._heap)
+
+    def _pop_due(self, now: float) -> List[ScheduledMessage]:
+        due_messages = []
+        self._discard_stale()
+        while self._heap and self._heap[0][0] <= now:
+            _, _, message = heapq.heappop(self._heap)
+            del self._pending[message.id]
+            if message.id in self._in_flight:
+                # Picked up again once the running delivery finishes
+                self._deferred[message.id] = message
+            else:
+                due_messages.append(message)
+            self._discard_stale()
+        return due_messages
+
+    def _next_delay(self) -> float:
+        self._discard_stale()
+        if not self._heap:
+            return MAX_SLEEP_SECONDS
+        return min(max(self._heap[0][0] - time.time(), 0), MAX_SLEEP_SECONDS)
+
+    def _dispatch(self, messages: List[ScheduledMessage]):
+        """Start delivering due messages without waiting for them.
+
+        Messages are delivered concurrently; the delivery engine keeps sends
+        to a shared channel in due-time order. Coalesced messages share one
+        task since they are merged into the same sends.
+        """
+        if len(messages) > 1 and coalescing_enabled():
+            batches = [messages]
+        else:
+            batches = [[message] for message in messages]
+        for batch in batches:
+            for message in batch:
+                self._in_flight[message.id] = message
+            task = asyncio.create_task(self._process(batch))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    async def _process(self, messages: List[ScheduledMessage]):
+        """Deliver a batch, schedule retries for failures and release deferred messages."""
         from .storage import schedule_manager
-        
+
+        try:
+            try:
+                if len(messages) > 1:
+                    results = await self._deliver_coalesced(messages)
+                else:
+                    results = [await self._deliver(messages[0])]
+            except Exception as e:
+                results = [e] * len(messages)
+            for msg, result in zip(messages, results):
+                if isinstance(result, Exception):
+                    logger.error(f"Error processing scheduled message: {result}", exc_info=result)
+                    if (
+                        schedule_manager.get_message(msg.id) is msg
+                        and msg.id not in self._pending
+                        and msg.id not in self._deferred
+                    ):
+                        self._push(msg, time.time() + RETRY_DELAY_SECONDS)
+                        self._wakeup.set()
+        finally:
+            for msg in messages:
+                self._in_flight.pop(msg.id, None)
+                deferred = self._deferred.pop(msg.id, None)
+                if deferred is not None and schedule_manager.get_message(msg.id) is deferred:
+                    self._push(deferred)
+                    self._wakeup.set()
+
+    async def _run(self):
         await self.bot.wait_until_ready()
-        
+
         try:
             while not self.bot.is_closed():
-                now = datetime.now()
-                messages = schedule_manager.messages
-                due_messages = [msg for msg in messages if datetime.fromisoformat(msg["timestamp"]) <= now]
-                
+                self._wakeup.clear()
+                now = time.time()
+                due_messages = self._pop_due(now)
+                for msg in due_messages:
+                    scheduler_lag.observe(max(now - msg.due_at, 0))
+
                 if due_messages:
                     logger.info(f"Processing {len(due_messages)} due messages")
+                    self._dispatch(due_messages)
                 else:
                     logger.debug("No messages due for delivery")
-                
-                for msg in due_messages:
-                    try:
-                        logger.debug(f"Processing message scheduled for {msg['timestamp']}")
-                        successful_channels = []
-                        failed_channels = []
-
-                        for channel_id in msg["channel_ids"]:
-                            channel = self.bot.get_channel(channel_id)
-                            if not isinstance(channel, discord.TextChannel):
-                                logger.warning(f"Channel {channel_id} is not a text channel")
-                                failed_channels.append(f"{channel_id} (invalid channel type)")
-                                continue
-
-                            channel_files = []
-                            for file_info in msg.get("files", []):
-                                try:
-                                    file = discord.File(file_info["path"], filename=file_info["filename"])
-                                    channel_files.append(file)
-                                except Exception as e:
-                                    logger.error(f"Error loading file {file_info['path']}: {e}", exc_info=True)
-                                    continue
-                            
-                            content = f"**Scheduled message from {msg['sender_name']}:**\n{msg['content']}" if msg['content'] else f"**Scheduled attachment from {msg['sender_name']}**"
-                            try:
-                                await channel.send(content=content, files=channel_files)
-                                successful_channels.append(str(channel_id))
-                            except discord.Forbidden:
-                                logger.warning(f"No permission to send message in channel {channel_id}")
-                                failed_channels.append(f"{channel_id} (no permission)")
-                            except Exception as e:
-                                logger.error(f"Error sending message to channel {channel_id}: {e}", exc_info=True)
-                                failed_channels.append(f"{channel_id} (error: {str(e)})")
-
-                        # Clean up files
-                        for file_info in msg.get("files", []):
-                            try:
-                                os.remove(file_info["path"])
-                                logger.debug(f"Cleaned up file: {file_info['path']}")
-                            except Exception as e:
-                                logger.error(f"Error removing file {file_info['path']}: {e}", exc_info=True)
-
-                        # Log delivery results
-                        if successful_channels:
-                            logger.info(f"Message delivered to channels: {', '.join(successful_channels)}")
-                        if failed_channels:
-                            logger.warning(f"Message delivery failed for channels: {', '.join(failed_channels)}")
-
-                        schedule_manager.remove_message(msg)
-                        logger.info("Message removed from schedule")
-                    
-                    except Exception as e:
-                        logger.error(f"Error processing scheduled message: {e}", exc_info=True)
 
-                await asyncio.sleep(60)
-        
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), timeout=self._next_delay())
+                except asyncio.TimeoutError:
+                    pass
+
         except asyncio.CancelledError:
             logger.info("Scheduler task cancelled")
             return
@@ -108,3 +229,200 @@ class ScheduleRunner:
             self._task = None
             logger.info("Attempting to restart scheduler task")
             await self.start()
+
+    @staticmethod
+    def _load_files(msg: ScheduledMessage) -> List[discord.File]:
+        channel_files = []
+        for file_info in msg.files:
+            try:
+                file = discord.File(file_info["path"], filename=file_info["filename"])
+                channel_files.append(file)
+            except Exception as e:
+                logger.error(f"Error loading file {file_info['path']}: {e}", exc_info=True)
+                continue
+        return channel_files
+
+    @staticmethod
+    def _format_content(msg: ScheduledMessage) -> str:
+        return f"**Scheduled message from {msg.sender_name}:**\n{msg.content}" if msg.content else f"**Scheduled attachment from {msg.sender_name}**"
+
+    async def _send_to_channel(
+        self,
+        msg: ScheduledMessage,
+        channel_id: int,
+        attachment_urls: Optional[List[str]] = None
+    ) -> Tuple[Optional[str], Optional[discord.Message]]:
+        """Send a scheduled message to one channel.
+
+        Returns:
+            tuple: (failure description or None on success, sent message or None).
+        """
+        content = self._format_content(msg)
+        if attachment_urls is not None:
+            content = append_attachment_links(content, attachment_urls)
+            channel_files = []
+        else:
+            channel_files = self._load_files(msg)
+        return await self._send(channel_id, content, channel_files)
+
+    async def _send(
+        self,
+        channel_id: int,
+        content: str,
+        channel_files: List[discord.File]
+    ) -> Tuple[Optional[str], Optional[discord.Message]]:
+        channel = self.bot.get_channel(channel_id)
+        if not isinstance(channel, discord.TextChannel):
+            logger.warning(f"Channel {channel_id} is not a text channel")
+            send_failures.inc(path="scheduler", channel_id=channel_id)
+            return f"{channel_id} (invalid channel type)", None
+
+        try:
+            message = await delivery_engine.send(channel, path="scheduler", content=content, files=channel_files)
+        except discord.Forbidden:
+            logger.warning(f"No permission to send message in channel {channel_id}")
+            return f"{channel_id} (no permission)", None
+        except Exception as e:
+            logger.error(f"Error sending message to channel {channel_id}: {e}", exc_info=True)
+            return f"{channel_id} (error: {str(e)})", None
+        return None, message
+
+    async def _deliver(self, msg: ScheduledMessage):
+        from .storage import schedule_manager
+
+        with span("scheduler.deliver", message_id=msg.id, channels=len(msg.channel_ids)):
+            logger.debug(f"Processing message scheduled for {msg.timestamp}")
+            # Channels finished before a restart are not sent to again
+            completed = set(msg.completed_channel_ids)
+            channel_ids = [channel_id for channel_id in msg.channel_ids if channel_id not in completed]
+            if completed:
+                logger.info(f"Resuming delivery: {len(completed)} channel(s) already completed")
+
+            async def send_and_checkpoint(channel_id: int, urls: Optional[List[str]]):
+                result = await self._send_to_channel(msg, channel_id, urls)
+                with span("storage.checkpoint"):
+                    schedule_manager.mark_channel_complete(msg, channel_id)
+                return result
+
+            link_attachments = bool(msg.files) and attachment_links_enabled()
+            staging_channel_id = get_staging_channel_id() if link_attachments else None
+            results = await broadcast(
+                channel_ids,
+                send_and_checkpoint,
+                link_attachments=link_attachments,
+                staging_channel=self.bot.get_channel(staging_channel_id) if staging_channel_id else None,
+                make_files=lambda: self._load_files(msg),
+                path="scheduler"
+            )
+            self._finish_delivery(msg, {channel_id: failure for channel_id, (failure, _) in zip(channel_ids, results)})
+
+    def _finish_delivery(self, msg: ScheduledMessage, failures: Dict[int, Optional[str]]):
+        """Log the outcome per channel and remove the delivered message."""
+        from .storage import schedule_manager
+
+        successful_channels = [str(channel_id) for channel_id, failure in failures.items() if failure is None]
+        failed_channels = [failure for failure in failures.values() if failure is not None]
+
+        # Log delivery results
+        if successful_channels:
+            logger.info(f"Message delivered to channels: {', '.join(successful_channels)}")
+        if failed_channels:
+            logger.warning(f"Message delivery failed for channels: {', '.join(failed_channels)}")
+
+        with span("storage.remove"):
+            schedule_manager.remove_message(msg)
+        logger.info("Message removed from schedule")
+
+    @classmethod
+    def _pack(cls, messages: List[ScheduledMessage]) -> Iterator[List[ScheduledMessage]]:
+        """Group messages, in order, into batches that fit in one Discord message."""
+        batch: List[ScheduledMessage] = []
+        length = file_count = 0
+        for msg in messages:
+            size = len(cls._format_content(msg))
+            if batch and (
+                length + len(COALESCE_SEPARATOR) + size > MAX_MESSAGE_LENGTH
+                or file_count + len(msg.files) > MAX_FILES_PER_MESSAGE
+            ):
+                yield batch
+                batch = []
+                length = file_count = 0
+            length += size + (len(COALESCE_SEPARATOR) if batch else 0)
+            file_count += len(msg.files)
+            batch.append(msg)
+        if batch:
+            yield batch
+
+    async def _send_coalesced(
+        self,
+        channel_id: int,
+        messages: List[ScheduledMessage],
+        failures: Dict[str, Dict[int, Optional[str]]]
+    ):
+        """Send co-due messages to one channel as few merged messages as fit.
+
+        Each message keeps its sender header. The outcome for every message
+        in a batch is recorded in ``failures`` and checkpointed per message.
+        """
+        from .storage import schedule_manager
+
+        batches = list(self._pack(messages))
+        if len(batches) < len(messages):
+            logger.debug(f"Coalesced {len(messages)} messages into {len(batches)} sends for channel {channel_id}")
+        with span("scheduler.deliver_coalesced", channel_id=channel_id, messages=len(messages), sends=len(batches)):
+            for batch in batches:
+                content = COALESCE_SEPARATOR.join(self._format_content(msg) for msg in batch)
+                channel_files = [file for msg in batch for file in self._load_files(msg)]
+                failure, _ = await self._send(channel_id, content, channel_files)
+                with span("storage.checkpoint"):
+                    for msg in batch:
+                        schedule_manager.mark_channel_complete(msg, channel_id)
+                        failures[msg.id][channel_id] = failure
+
+    async def _deliver_coalesced(self, messages: List[ScheduledMessage]) -> List[Optional[BaseException]]:
+        """Deliver co-due messages, merging those that share a channel.
+
+        Messages whose attachments go out in link mode are delivered on
+        their own, since their files are uploaded once and linked.
+
+        Returns:
+            list: The exception raised while delivering each message, or None.
+        """
+        link_attachments = attachment_links_enabled()
+        single = [msg for msg in messages if link_attachments and msg.files]
+        merged = [msg for msg in messages if not (link_attachments and msg.files)]
+
+        # Messages arrive in due-time order, which each channel's list keeps
+        by_channel: Dict[int, List[ScheduledMessage]] = {}
+        for msg in merged:
+            completed = set(msg.completed_channel_ids)
+            if completed:
+                logger.info(f"Resuming delivery: {len(completed)} channel(s) already completed")
+            for channel_id in msg.channel_ids:
+                if channel_id not in completed:
+                    by_channel.setdefault(channel_id, []).append(msg)
+
+        failures: Dict[str, Dict[int, Optional[str]]] = {msg.id: {} for msg in merged}
+        results = await asyncio.gather(
+            *(self._send_coalesced(channel_id, batch, failures) for channel_id, batch in by_channel.items()),
+            *(self._deliver(msg) for msg in single),
+            return_exceptions=True
+        )
+
+        errors: Dict[str, BaseException] = {}
+        for batch, result in zip(by_channel.values(), results):
+            if isinstance(result, Exception):
+                for msg in batch:
+                    errors.setdefault(msg.id, result)
+        with span("scheduler.finish_coalesced", messages=len(merged)):
+            for msg in merged:
+                if msg.id not in errors:
+                    try:
+                        self._finish_delivery(msg, failures[msg.id])
+                    except Exception as e:
+                        errors[msg.id] = e
+        single_results = dict(zip((msg.id for msg in single), results[len(by_channel):]))
+        return [
+            errors.get(msg.id) if msg.id in failures else single_results[msg.id]
+            for msg in messages
+        ]
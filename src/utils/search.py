@@ -0,0 +1,215 @@
+"""Ranked channel name search."""
+
+import math
+import re
+from collections import Counter
+from typing import Container, Dict, Iterable, List, Optional, Set, Tuple
+
+import discord
+
+from .logger import get_logger
+
+logger = get_logger('search')
+
+# Token prefixes up to this length are indexed for instant prefix matches
+MAX_PREFIX_LENGTH = 12
+# Share of the query's trigrams a name needs to count as a fuzzy match
+MIN_TRIGRAM_OVERLAP = 0.6
+
+_separators = re.compile(r"[\W_]+")
+
+
+def normalize(name: str) -> Tuple[str, List[str]]:
+    """Split a channel name into a compact form and its word tokens.
+
+    ``"📢-Team Announcements"`` becomes ``("teamannouncements",
+    ["team", "announcements"])``.
+    """
+    tokens = [token for token in _separators.split(name.casefold()) if token]
+    return "".join(tokens), tokens
+
+
+def _trigrams(text: str) -> Set[str]:
+    # A leading pad makes trigrams at the start of a name count extra
+    padded = f"  {text}"
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+class ChannelSearchIndex:
+    """Search index over the channel names of one guild.
+
+    Names are normalized once when added. The index keeps a map from token
+    and compact-name prefixes to channel IDs plus trigram posting lists, so
+    a search only looks at channels sharing a prefix or trigram with the
+    query. Names containing the query are found by intersecting the
+    posting lists of its trigrams, or for queries shorter than a trigram,
+    from the trigrams containing it. Channels can be added, renamed and removed incrementally.
+    """
+
+    def __init__(self, channels: Iterable[Tuple[int, str]] = ()):
+        self._names: Dict[int, str] = {}
+        self._compact: Dict[int, str] = {}
+        self._prefixes: Dict[str, Set[int]] = {}
+        self._trigrams: Dict[str, Set[int]] = {}
+        for channel_id, name in channels:
+            self.add(channel_id, name)
+
+    def __len__(self) -> int:
+        return len(self._names)
+
+    def _keys(self, channel_id: int) -> Tuple[Set[str], Set[str]]:
+        compact, tokens = normalize(self._names[channel_id])
+        prefixes = {
+            word[:length]
+            for word in (compact, *tokens)
+            for length in range(1, min(len(word), MAX_PREFIX_LENGTH) + 1)
+        }
+        return prefixes, _trigrams(compact)
+
+    def add(self, channel_id: int, name: str):
+        """Index a channel, replacing any previous entry for it."""
+        self.remove(channel_id)
+        self._names[channel_id] = name
+        self._compact[channel_id] = normalize(name)[0]
+        prefixes, trigrams = self._keys(channel_id)
+        for prefix in prefixes:
+            self._prefixes.setdefault(prefix, set()).add(channel_id)
+        for trigram in trigrams:
+            self._trigrams.setdefault(trigram, set()).add(channel_id)
+
+    def remove(self, channel_id: int):
+        """Remove a channel from the index if it is indexed."""
+        if channel_id not in self._names:
+            return
+        prefixes, trigrams = self._keys(channel_id)
+        for prefix in prefixes:
+            self._discard(self._prefixes, prefix, channel_id)
+        for trigram in trigrams:
+            self._discard(self._trigrams, trigram, channel_id)
+        del self._names[channel_id]
+        del self._compact[channel_id]
+
+    @staticmethod
+    def _discard(postings: Dict[str, Set[int]], key: str, channel_id: int):
+        ids = postings[key]
+        ids.discard(channel_id)
+        if not ids:
+            del postings[key]
+
+    def _substring_hits(self, query: str) -> Set[int]:
+        """Get the IDs of channels whose compact name contains ``query``."""
+        if len(query) < 3:
+            # Shorter queries lie within some trigram of every name containing them
+            hits: Set[int] = set()
+            for trigram, ids in self._trigrams.items():
+                if query in trigram:
+                    hits |= ids
+            return hits
+        # Every trigram of a substring is indexed for the name containing it
+        postings = sorted(
+            (self._trigrams.get(query[i:i + 3], set()) for i in range(len(query) - 2)),
+            key=len
+        )
+        return {
+            channel_id
+            for channel_id in postings[0].intersection(*postings[1:])
+            if query in self._compact[channel_id]
+        }
+
+    def _score(self, channel_id: int, query: str, prefix_hits: Set[int], overlap: float) -> float:
+        compact = self._compact[channel_id]
+        if compact == query:
+            return 4.0
+        if compact.startswith(query):
+            return 3.0
+        if channel_id in prefix_hits:
+            return 2.0
+        if query in compact:
+            return 1.0 + overlap
+        return overlap
+
+    def search(
+        self,
+        query: str,
+        allowed: Optional[Container[int]] = None,
+        limit: Optional[int] = None
+    ) -> List[int]:
+        """Find channels matching ``query``, best matches first.
+
+        Exact names rank first, then name prefixes, word prefixes, substrings
+        and finally fuzzy matches by trigram overlap. Ties go to the shorter
+        name.
+
+        Args:
+            query: Text to search for.
+            allowed: If given, only channel IDs in it are returned.
+            limit: Maximum number of results.
+
+        Returns:
+            list: Matching channel IDs.
+        """
+        query, _ = normalize(query)
+        if not query:
+            return []
+
+        prefix_hits = set(self._prefixes.get(query[:MAX_PREFIX_LENGTH], ()))
+        query_trigrams = _trigrams(query)
+        counts = Counter()
+        for trigram in query_trigrams:
+            counts.update(self._trigrams.get(trigram, ()))
+        needed = max(1, math.ceil(len(query_trigrams) * MIN_TRIGRAM_OVERLAP))
+
+        candidates = prefix_hits | self._substring_hits(query)
+        candidates.update(channel_id for channel_id, count in counts.items() if count >= needed)
+        if allowed is not None:
+            candidates = [channel_id for channel_id in candidates if channel_id in allowed]
+        ranked = sorted(
+            candidates,
+            key=lambda channel_id: (
+                -self._score(channel_id, query, prefix_hits, counts[channel_id] / len(query_trigrams)),
+                len(self._compact[channel_id]),
+                self._names[channel_id]
+            )
+        )
+        return ranked[:limit] if limit is not None else ranked
+
+
+class ChannelSearchIndexes:
+    """Per-guild channel search indexes, built on first use.
+
+    Indexes cover every text channel in the guild; callers narrow results
+    to the channels a member may use with the ``allowed`` argument.
+    """
+
+    def __init__(self):
+        self._indexes: Dict[int, ChannelSearchIndex] = {}
+
+    def for_guild(self, guild: discord.Guild) -> ChannelSearchIndex:
+        index = self._indexes.get(guild.id)
+        if index is None:
+            index = self._indexes[guild.id] = ChannelSearchIndex(
+                (channel.id, channel.name) for channel in guild.text_channels
+            )
+            logger.debug(f"Built channel search index for guild {guild.id} with {len(index)} channels")
+        return index
+
+    def update_channel(self, channel: discord.abc.GuildChannel):
+        """Index a created or changed channel in an already built index."""
+        index = self._indexes.get(channel.guild.id)
+        if index is None:
+            return
+        if isinstance(channel, discord.TextChannel):
+            index.add(channel.id, channel.name)
+        else:
+            index.remove(channel.id)
+
+    def remove_channel(self, channel: discord.abc.GuildChannel):
+        index = self._indexes.get(channel.guild.id)
+        if index is not None:
+            index.remove(channel.id)
+
+    def discard_guild(self, guild_id: int):
+        self._indexes.pop(guild_id, None)
+
+
+channel_search = ChannelSearchIndexes()
@@ -0,0 +1,45 @@
+"""Mapping guilds to gateway shards and shards to cluster workers."""
+
+from typing import Callable, Collection, List, Optional
+
+GuildFilter = Callable[[Optional[int]], bool]
+
+
+def shard_for_guild(guild_id: Optional[int], shard_count: int) -> int:
+    """Get the shard Discord sends a guild's events to.
+
+    Messages without a guild belong to shard 0, like direct messages.
+    """
+    return ((guild_id or 0) >> 22) % shard_count
+
+
+def guild_filter(shard_ids: Collection[int], shard_count: int) -> GuildFilter:
+    """Make a predicate telling whether a guild is on one of ``shard_ids``."""
+    owned = frozenset(shard_ids)
+    return lambda guild_id: shard_for_guild(guild_id, shard_count) in owned
+
+
+def shard_ranges(shard_count: int, workers: int) -> List[List[int]]:
+    """Split shards into contiguous ranges, one per worker.
+
+    Ranges differ in length by at most one shard. There are never more
+    ranges than shards.
+
+    Args:
+        shard_count: Total number of shards.
+        workers: Number of worker processes to spread them over.
+
+    Returns:
+        list: The shard IDs of each worker, in order.
+    """
+    if shard_count < 1 or workers < 1:
+        raise ValueError("shard_count and workers must be at least 1")
+    workers = min(workers, shard_count)
+    size, extra = divmod(shard_count, workers)
+    ranges = []
+    start = 0
+    for worker in range(workers):
+        end = start + size + (1 if worker < extra else 0)
+        ranges.append(list(range(start, end)))
+        start = end
+    return ranges
@@ -1,52 +1,800 @@
 """Storage manager for scheduled messages."""
 
+import asyncio
 import json
+import os
+import sqlite3
+import threading
+from array import array
+from datetime import datetime
+from operator import attrgetter
 from pathlib import Path
-from typing import List, Dict, Any
+from typing import Any, Callable, Collection, Dict, List, Optional, Tuple, Union
+
+from .metrics import scheduled_messages_pending, storage_write_seconds
+from .records import ScheduledMessage
 
 # Use Path for better cross-platform path handling
 DATA_DIR = Path("data")
 SCHEDULED_FILE = DATA_DIR / "scheduled.json"
+SCHEDULED_DB = DATA_DIR / "scheduled.db"
+SCHEDULED_SNAPSHOT = DATA_DIR / "scheduled.snapshot.json"
+SCHEDULED_JOURNAL = DATA_DIR / "scheduled.journal"
+
+# Seconds the JSON store waits to coalesce a burst of changes into one write
+DEFAULT_WRITE_DELAY = 0.5
+# Journal size at which the journal store writes a fresh snapshot
+DEFAULT_JOURNAL_COMPACT_BYTES = 1024 * 1024
 
 # Ensure data directory exists
 DATA_DIR.mkdir(exist_ok=True)
 
+ScheduleListener = Callable[[str, Optional[ScheduledMessage]], None]
+
+_by_due_at = attrgetter("due_at")
+
+
+def _records_from_dicts(data: List[Dict[str, Any]]) -> Tuple[List[ScheduledMessage], bool]:
+    """Convert stored dicts to records.
+
+    Returns:
+        tuple: (records, whether any entry predates message IDs and was
+        assigned a new one that still needs to be persisted).
+    """
+    messages = [ScheduledMessage.from_dict(message) for message in data]
+    return messages, any("id" not in message for message in data)
+
+
+class JsonScheduleStore:
+    """Stores scheduled messages as a single JSON document.
+
+    When an event loop is running, saves are handed to a writer task that
+    waits ``write_delay`` seconds so a burst of changes becomes one write,
+    then serializes and writes the latest state in a worker thread. Writes
+    go to a temporary file that is renamed over the document. ``flush``
+    forces any pending write out, e.g. on shutdown.
+    """
+
+    def __init__(self, path: Path = SCHEDULED_FILE, write_delay: float = DEFAULT_WRITE_DELAY):
+        self.path = Path(path)
+        self.write_delay = write_delay
+        self._pending: Optional[Collection[ScheduledMessage]] = None
+        self._writer: Optional[asyncio.Task] = None
+        self._flush_requested = asyncio.Event()
+        self._write_lock = threading.Lock()
+
+    def load(self) -> List[ScheduledMessage]:
+        if not self.path.exists():
+            return []
+        try:
+            data = json.loads(self.path.read_text())
+        except json.JSONDecodeError:
+            print("Error loading scheduled messages file")
+            return []
+        messages, assigned_ids = _records_from_dicts(data)
+        if assigned_ids:
+            self._write(messages)
+        return messages
+
+    def _write(self, payload: List[ScheduledMessage]):
+        with self._write_lock, storage_write_seconds.timer(backend="json", operation="save"):
+            temp_path = self.path.with_name(self.path.name + ".tmp")
+            temp_path.write_text(json.dumps([message.to_dict() for message in payload], indent=2))
+            os.replace(temp_path, self.path)
+
+    def save(self, messages: Collection[ScheduledMessage]):
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            self._pending = None
+            self._write(list(messages))
+            return
+        self._pending = messages
+        if self._writer is None or self._writer.done():
+            self._writer = loop.create_task(self._write_pending())
+
+    async def _write_pending(self):
+        loop = asyncio.get_running_loop()
+        while self._pending is not None:
+            try:
+                await asyncio.wait_for(self._flush_requested.wait(), timeout=self.write_delay)
+            except asyncio.TimeoutError:
+                pass
+            payload = list(self._pending)
+            self._pending = None
+            try:
+                await loop.run_in_executor(None, self._write, payload)
+            except Exception as e:
+                print(f"Error saving scheduled messages file: {e}")
+
+    async def flush(self):
+        """Write any pending changes now and wait for the write to finish."""
+        if self._writer is not None and not self._writer.done():
+            self._flush_requested.set()
+            try:
+                await self._writer
+            finally:
+                self._flush_requested.clear()
+
+    def insert(self, message: ScheduledMessage, messages: Collection[ScheduledMessage]):
+        self.save(messages)
+
+    def delete(self, message: ScheduledMessage, messages: Collection[ScheduledMessage]):
+        self.save(messages)
+
+    def update(self, message: ScheduledMessage, messages: Collection[ScheduledMessage]):
+        self.save(messages)
+
+    def due(self, now: float, messages: Collection[ScheduledMessage]) -> List[ScheduledMessage]:
+        return sorted((message for message in messages if message.due_at <= now), key=_by_due_at)
+
+    def for_guild(self, guild_id: int, messages: Collection[ScheduledMessage]) -> List[ScheduledMessage]:
+        return sorted((message for message in messages if message.guild_id == guild_id), key=_by_due_at)
+
+    def close(self):
+        if self._pending is not None:
+            payload = list(self._pending)
+            self._pending = None
+            self._write(payload)
+
+
+class SqliteScheduleStore:
+    """Stores scheduled messages in SQLite, indexed by due time and guild.
+
+    Each message is a row holding its JSON payload alongside the indexed
+    ``due_at`` and ``guild_id`` columns. Inserts and deletes are single-row
+    transactions. When an event loop is running, updates (such as delivery
+    checkpoints) are queued and committed by a writer task in a worker
+    thread, one transaction per batch, keeping only the latest state of
+    each message; ``flush`` waits for them. On first use an existing
+    ``scheduled.json`` is imported and renamed to ``scheduled.json.imported``.
+
+    Cluster workers share one database: given ``shard_ids`` and
+    ``shard_count``, a store only loads, and ``save()`` only replaces, the
+    messages of guilds on those shards.
+    """
+
+    def __init__(
+        self,
+        path: Path = SCHEDULED_DB,
+        json_path: Optional[Path] = SCHEDULED_FILE,
+        shard_ids: Optional[Collection[int]] = None,
+        shard_count: Optional[int] = None
+    ):
+        if shard_ids is not None and not shard_count:
+            raise ValueError("shard_count is required with shard_ids")
+        self.path = Path(path)
+        self.shard_ids = sorted(shard_ids) if shard_ids is not None else None
+        self.shard_count = shard_count
+        # Other workers may hold the write lock briefly. The connection is
+        # shared with the update writer thread and guarded by _lock.
+        self._conn = sqlite3.connect(str(self.path), timeout=30, check_same_thread=False)
+        self._lock = threading.Lock()
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        with self._conn:
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS scheduled_messages ("
+                " id INTEGER PRIMARY KEY,"
+                " due_at REAL NOT NULL,"
+                " guild_id INTEGER,"
+                " payload TEXT NOT NULL)"
+            )
+            self._conn.execute(
+                "CREATE INDEX IF NOT EXISTS idx_scheduled_due_at ON scheduled_messages (due_at)"
+            )
+            self._conn.execute(
+                "CREATE INDEX IF NOT EXISTS idx_scheduled_guild_due ON scheduled_messages (guild_id, due_at)"
+            )
+        # Row ids of the loaded messages, keyed by message ID
+        self._rowids: Dict[str, int] = {}
+        self._by_rowid: Dict[int, ScheduledMessage] = {}
+        # Updates waiting for the writer: (message ID, rowid) -> column values
+        self._pending_updates: Dict[Tuple[str, int], tuple] = {}
+        self._writer: Optional[asyncio.Task] = None
+        if json_path is not None:
+            self._import_json(Path(json_path))
+
+    def _import_json(self, json_path: Path):
+        """Import messages from the JSON store once."""
+        if not json_path.exists():
+            return
+        messages = JsonScheduleStore(json_path).load()
+        with self._conn:
+            for message in messages:
+                self._insert_row(message)
+        json_path.rename(json_path.with_name(json_path.name + ".imported"))
+        print(f"Imported {len(messages)} scheduled messages from {json_path}")
+
+    def _insert_row(self, message: ScheduledMessage) -> int:
+        cursor = self._conn.execute(
+            "INSERT INTO scheduled_messages (due_at, guild_id, payload) VALUES (?, ?, ?)",
+            (message.due_at, message.guild_id, json.dumps(message.to_dict()))
+        )
+        return cursor.lastrowid
+
+    def _owned_rows(self) -> Tuple[str, tuple]:
+        """A WHERE clause matching the rows on this store's shards."""
+        if self.shard_ids is None:
+            return "1", ()
+        # Same mapping as sharding.shard_for_guild
+        placeholders = ", ".join("?" for _ in self.shard_ids)
+        return (
+            f"((COALESCE(guild_id, 0) >> 22) % ?) IN ({placeholders})",
+            (self.shard_count, *self.shard_ids)
+        )
+
+    def _track(self, rowid: int, message: ScheduledMessage):
+        self._rowids[message.id] = rowid
+        self._by_rowid[rowid] = message
+
+    def load(self) -> List[ScheduledMessage]:
+        messages = []
+        assigned_ids = []
+        where, params = self._owned_rows()
+        with self._lock:
+            self._rowids = {}
+            self._by_rowid = {}
+            self._pending_updates = {}
+            for rowid, payload in self._conn.execute(
+                f"SELECT id, payload FROM scheduled_messages WHERE {where} ORDER BY due_at, id", params
+            ).fetchall():
+                data = json.loads(payload)
+                message = ScheduledMessage.from_dict(data)
+                self._track(rowid, message)
+                messages.append(message)
+                if "id" not in data:
+                    assigned_ids.append(message)
+            if assigned_ids:
+                # Persist IDs given to rows written before messages had them
+                with self._conn:
+                    for message in assigned_ids:
+                        self._update_row(message)
+        return messages
+
+    def save(self, messages: Collection[ScheduledMessage]):
+        with self._lock, storage_write_seconds.timer(backend="sqlite", operation="save"), self._conn:
+            where, params = self._owned_rows()
+            self._conn.execute(f"DELETE FROM scheduled_messages WHERE {where}", params)
+            self._rowids = {}
+            self._by_rowid = {}
+            self._pending_updates = {}
+            for message in messages:
+                self._track(self._insert_row(message), message)
+
+    def insert(self, message: ScheduledMessage, messages: Collection[ScheduledMessage]):
+        with self._lock:
+            with storage_write_seconds.timer(backend="sqlite", operation="add"), self._conn:
+                rowid = self._insert_row(message)
+            self._track(rowid, message)
+
+    def delete(self, message: ScheduledMessage, messages: Collection[ScheduledMessage]):
+        with self._lock:
+            rowid = self._rowids.pop(message.id, None)
+            if rowid is None:
+                return
+            self._pending_updates.pop((message.id, rowid), None)
+            with storage_write_seconds.timer(backend="sqlite", operation="remove"), self._conn:
+                self._conn.execute("DELETE FROM scheduled_messages WHERE id = ?", (rowid,))
+            self._by_rowid.pop(rowid, None)
+
+    @staticmethod
+    def _row_values(message: ScheduledMessage) -> tuple:
+        return message.due_at, message.guild_id, json.dumps(message.to_dict())
+
+    def _update_row(self, message: ScheduledMessage):
+        self._conn.execute(
+            "UPDATE scheduled_messages SET due_at = ?, guild_id = ?, payload = ? WHERE id = ?",
+            (*self._row_values(message), self._rowids[message.id])
+        )
+
+    def update(self, message: ScheduledMessage, messages: Collection[ScheduledMessage]):
+        rowid = self._rowids.get(message.id)
+        if rowid is None:
+            return
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            with self._lock, storage_write_seconds.timer(backend="sqlite", operation="update"), self._conn:
+                self._update_row(message)
+            return
+        # Serialize now; the message may change while the writer runs
+        self._pending_updates[(message.id, rowid)] = self._row_values(message)
+        if self._writer is None or self._writer.done():
+            self._writer = loop.create_task(self._write_pending())
+
+    async def _write_pending(self):
+        loop = asyncio.get_running_loop()
+        while self._pending_updates:
+            try:
+                await loop.run_in_executor(None, self._write_updates)
+            except Exception as e:
+                print(f"Error saving scheduled message updates: {e}")
+
+    def _write_updates(self):
+        """Commit the queued updates in one transaction."""
+        with self._lock:
+            rows = []
+            while self._pending_updates:
+                (message_id, rowid), values = self._pending_updates.popitem()
+                # Skip rows deleted, or replaced by save(), since the update was queued
+                if self._rowids.get(message_id) == rowid:
+                    rows.append((*values, rowid))
+            if not rows:
+                return
+            with storage_write_seconds.timer(backend="sqlite", operation="update"), self._conn:
+                self._conn.executemany(
+                    "UPDATE scheduled_messages SET due_at = ?, guild_id = ?, payload = ? WHERE id = ?",
+                    rows
+                )
+
+    def without_guild(self) -> List[ScheduledMessage]:
+        """Load the messages stored without a guild ID, from before messages had one.
+
+        The messages are tracked like loaded ones, so giving them a guild and
+        passing them to ``update`` stores it.
+        """
+        messages = []
+        with self._lock:
+            for rowid, payload in self._conn.execute(
+                "SELECT id, payload FROM scheduled_messages WHERE guild_id IS NULL ORDER BY due_at, id"
+            ).fetchall():
+                message = ScheduledMessage.from_dict(json.loads(payload))
+                self._track(rowid, message)
+                messages.append(message)
+        return messages
+
+    def _select(self, query: str, params: tuple) -> List[ScheduledMessage]:
+        with self._lock:
+            rowids = self._conn.execute(query, params).fetchall()
+        return [self._by_rowid[rowid] for (rowid,) in rowids if rowid in self._by_rowid]
+
+    def due(self, now: float, messages: Collection[ScheduledMessage]) -> List[ScheduledMessage]:
+        return self._select(
+            "SELECT id FROM scheduled_messages WHERE due_at <= ? ORDER BY due_at, id", (now,)
+        )
+
+    def for_guild(self, guild_id: int, messages: Collection[ScheduledMessage]) -> List[ScheduledMessage]:
+        return self._select(
+            "SELECT id FROM scheduled_messages WHERE guild_id = ? ORDER BY due_at, id", (guild_id,)
+        )
+
+    async def flush(self):
+        """Wait for queued updates to be committed."""
+        if self._writer is not None and not self._writer.done():
+            await self._writer
+
+    def close(self):
+        self._write_updates()
+        self._conn.close()
+
+
+class JournalScheduleStore(JsonScheduleStore):
+    """Stores scheduled messages as a snapshot plus an append-only journal.
+
+    Every add, update or remove appends one JSON line to the current journal
+    generation (``scheduled.journal.<n>``), keyed by message ID. Loading reads the snapshot and
+    replays the journals newer than it. When an event loop is running,
+    records are queued and a writer task appends them in a worker thread,
+    so a burst of records (such as delivery checkpoints) shares one write
+    and fsync. Once the journal grows past
+    ``compact_bytes`` a new generation is started and the snapshot is
+    rewritten in a worker thread; journals it covers are then deleted, so a
+    crash at any point leaves a replayable state. An existing
+    ``scheduled.json`` is imported as the first snapshot.
+    """
+
+    def __init__(
+        self,
+        snapshot_path: Path = SCHEDULED_SNAPSHOT,
+        journal_path: Path = SCHEDULED_JOURNAL,
+        json_path: Optional[Path] = SCHEDULED_FILE,
+        compact_bytes: Optional[int] = None,
+        fsync: Optional[bool] = None
+    ):
+        super().__init__(snapshot_path)
+        self.journal_path = Path(journal_path)
+        self.json_path = Path(json_path) if json_path is not None else None
+        if compact_bytes is None:
+            compact_bytes = int(os.getenv('JOURNAL_COMPACT_BYTES', DEFAULT_JOURNAL_COMPACT_BYTES))
+        if fsync is None:
+            fsync = os.getenv('JOURNAL_FSYNC', 'true').lower() == 'true'
+        self.compact_bytes = compact_bytes
+        self.fsync = fsync
+        self._generation = 0
+        self._journal = None
+        self._journal_size = 0
+        # Guards the journal file against the append writer thread
+        self._journal_lock = threading.Lock()
+        self._pending_lines: List[str] = []
+        self._messages: Collection[ScheduledMessage] = []
+        self._compaction: Optional[asyncio.Future] = None
+        self._snapshot_lock = threading.Lock()
+        self._snapshot_generation = -1
+
+    def _journal_file(self, generation: int) -> Path:
+        return self.journal_path.with_name(f"{self.journal_path.name}.{generation}")
+
+    def _journal_generations(self) -> List[int]:
+        generations = []
+        for path in self.journal_path.parent.glob(f"{self.journal_path.name}.*"):
+            suffix = path.name.rsplit(".", 1)[-1]
+            if suffix.isdigit():
+                generations.append(int(suffix))
+        return sorted(generations)
+
+    def _read_snapshot(self) -> tuple[int, List[Dict[str, Any]]]:
+        if not self.path.exists():
+            return 0, []
+        try:
+            snapshot = json.loads(self.path.read_text())
+        except json.JSONDecodeError:
+            print("Error loading scheduled messages snapshot")
+            return 0, []
+        return snapshot["generation"], snapshot["messages"]
+
+    @classmethod
+    def _replay(cls, path: Path, messages: Dict[Any, Dict[str, Any]]):
+        """Apply a journal to ``messages``, a dict of message dicts by ID."""
+        with path.open() as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    # A torn final line from a crash mid-append
+                    print(f"Skipping unreadable journal record in {path}")
+                    continue
+                op = record["op"]
+                message = record.get("message")
+                if op == "remove":
+                    key = record["id"] if "id" in record else cls._find(messages, message)
+                    messages.pop(key, None)
+                elif op == "update" and "previous" in record:
+                    # Written before records had IDs; match the previous state
+                    key = cls._find(messages, record["previous"])
+                    if key is not None:
+                        messages[key] = message
+                elif op == "add":
+                    messages[cls._key(message)] = message
+                elif op == "update":
+                    # An update can never create a message that was removed
+                    key = cls._key(message)
+                    if key in messages:
+                        messages[key] = message
+
+    @staticmethod
+    def _key(message: Dict[str, Any]) -> Any:
+        # Entries written before records had IDs are keyed by object identity
+        return message.get("id") or id(message)
+
+    @staticmethod
+    def _find(messages: Dict[Any, Dict[str, Any]], message: Dict[str, Any]) -> Any:
+        for key, stored in messages.items():
+            if stored == message:
+                return key
+        return None
+
+    def _write_snapshot(self, generation: int, payload: Collection[ScheduledMessage]):
+        """Atomically replace the snapshot and drop the journals it covers."""
+        with self._snapshot_lock, storage_write_seconds.timer(backend="journal", operation="snapshot"):
+            # A newer snapshot may already have been written by save()
+            if generation <= self._snapshot_generation:
+                return
+            temp_path = self.path.with_name(self.path.name + ".tmp")
+            with temp_path.open("w") as f:
+                json.dump(
+                    {"generation": generation, "messages": [message.to_dict() for message in payload]},
+                    f
+                )
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(temp_path, self.path)
+            self._snapshot_generation = generation
+            for old_generation in self._journal_generations():
+                if old_generation <= generation:
+                    self._journal_file(old_generation).unlink(missing_ok=True)
+
+    def _open_journal(self, generation: int):
+        with self._journal_lock:
+            if self._journal is not None:
+                self._journal.close()
+            self._generation = generation
+            path = self._journal_file(generation)
+            self._journal = path.open("a")
+            self._journal_size = path.stat().st_size
+
+    def load(self) -> List[ScheduledMessage]:
+        if not self.path.exists() and self.json_path is not None and self.json_path.exists():
+            self._write_snapshot(0, JsonScheduleStore(self.json_path).load())
+            self.json_path.rename(self.json_path.with_name(self.json_path.name + ".imported"))
+            print(f"Imported scheduled messages from {self.json_path}")
+
+        generation, snapshot = self._read_snapshot()
+        self._snapshot_generation = generation
+        messages = {self._key(message): message for message in snapshot}
+        journals = [g for g in self._journal_generations() if g > generation]
+        for journal_generation in journals:
+            self._replay(self._journal_file(journal_generation), messages)
+        self._open_journal(journals[-1] if journals else generation + 1)
+        records, assigned_ids = _records_from_dicts(list(messages.values()))
+        if assigned_ids:
+            # Later journal records must be able to refer to the new IDs
+            self.save(records)
+        self._messages = records
+        return records
+
+    def _write_lines(self, lines: List[str], operation: str):
+        with self._journal_lock, storage_write_seconds.timer(backend="journal", operation=operation):
+            self._journal.write("".join(lines))
+            self._journal.flush()
+            if self.fsync:
+                os.fsync(self._journal.fileno())
+
+    def _append(self, record: Dict[str, Any], messages: Collection[ScheduledMessage]):
+        self._messages = messages
+        line = json.dumps(record) + "\n"
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            self._write_lines([line], record["op"])
+        else:
+            # Records queued across a compaction land in the next generation;
+            # replaying them over a snapshot that includes them is harmless
+            self._pending_lines.append(line)
+            if self._writer is None or self._writer.done():
+                self._writer = loop.create_task(self._append_pending())
+        self._journal_size += len(line)
+        if self._journal_size >= self.compact_bytes:
+            self.compact()
+
+    async def _append_pending(self):
+        loop = asyncio.get_running_loop()
+        while self._pending_lines:
+            lines = self._pending_lines
+            self._pending_lines = []
+            try:
+                await loop.run_in_executor(None, self._write_lines, lines, "append")
+            except Exception as e:
+                print(f"Error appending to schedule journal: {e}")
+
+    def insert(self, message: ScheduledMessage, messages: Collection[ScheduledMessage]):
+        self._append({"op": "add", "message": message.to_dict()}, messages)
+
+    def delete(self, message: ScheduledMessage, messages: Collection[ScheduledMessage]):
+        self._append({"op": "remove", "id": message.id}, messages)
+
+    def update(self, message: ScheduledMessage, messages: Collection[ScheduledMessage]):
+        self._append({"op": "update", "message": message.to_dict()}, messages)
+
+    def compact(self):
+        """Start a new journal generation and snapshot the current state.
+
+        The snapshot is written in a worker thread when an event loop is
+        running, and synchronously otherwise.
+        """
+        if self._compaction is not None and not self._compaction.done():
+            return
+        generation = self._generation
+        payload = list(self._messages)
+        self._open_journal(generation + 1)
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            self._write_snapshot(generation, payload)
+            return
+        self._compaction = loop.run_in_executor(None, self._write_snapshot, generation, payload)
+        self._compaction.add_done_callback(self._on_compacted)
+
+    @staticmethod
+    def _on_compacted(future: asyncio.Future):
+        if not future.cancelled() and future.exception() is not None:
+            print(f"Error compacting schedule journal: {future.exception()}")
+
+    def save(self, messages: Collection[ScheduledMessage]):
+        self._messages = messages
+        generation = self._generation
+        self._open_journal(generation + 1)
+        self._write_snapshot(generation, list(messages))
+
+    async def flush(self):
+        if self._writer is not None and not self._writer.done():
+            await self._writer
+        if self._compaction is not None:
+            # Failures are already reported by _on_compacted
+            await asyncio.wait([self._compaction])
+
+    def close(self):
+        if self._pending_lines and self._journal is not None:
+            lines = self._pending_lines
+            self._pending_lines = []
+            self._write_lines(lines, "append")
+        if self._journal is not None:
+            self._journal.close()
+            self._journal = None
+
+
+def schedule_backend(backend: Optional[str] = None) -> str:
+    """Get ``backend`` or the ``SCHEDULE_BACKEND`` setting, lowercased."""
+    return (backend or os.getenv('SCHEDULE_BACKEND', 'json')).lower()
+
+
+def create_store(
+    backend: Optional[str] = None,
+    shard_ids: Optional[Collection[int]] = None,
+    shard_count: Optional[int] = None
+):
+    """Create the schedule store named by ``backend`` or ``SCHEDULE_BACKEND``.
+
+    Supported backends are ``json`` (the default), ``sqlite`` and ``journal``.
+    Only ``sqlite`` can be shared by cluster workers, so it is the only
+    backend accepting ``shard_ids``.
+    """
+    backend = schedule_backend(backend)
+    if shard_ids is not None and backend != 'sqlite':
+        raise ValueError(f"The {backend} schedule backend cannot be shared by cluster workers; use sqlite")
+    if backend == 'json':
+        return JsonScheduleStore()
+    if backend == 'sqlite':
+        return SqliteScheduleStore(shard_ids=shard_ids, shard_count=shard_count)
+    if backend == 'journal':
+        return JournalScheduleStore()
+    raise ValueError(f"Unknown schedule backend: {backend}")
+
+
 class ScheduleManager:
-    def __init__(self):
-        self._messages: List[Dict[str, Any]] = []
+    """Keeps the scheduled messages and forwards changes to a store.
+
+    Messages are indexed by their ID, so looking one up, updating it or
+    removing it does not scan the schedule. Time-ordered queries are
+    answered by the store, and the runner keeps its own due-time heap.
+    """
+
+    def __init__(self, store=None):
+        self._store = store if store is not None else JsonScheduleStore()
+        self._by_id: Dict[str, ScheduledMessage] = {}
+        self._listeners: List[ScheduleListener] = []
         self.load_messages()
 
-    def load_messages(self):
-        """Load scheduled messages from file."""
-        if SCHEDULED_FILE.exists():
+    def add_listener(self, listener: ScheduleListener):
+        """Register a callback for schedule changes.
+
+        The callback is invoked as ``listener(event, message)`` where event is
+        ``"add"``, ``"update"``, ``"remove"`` or ``"reload"`` (message is None
+        for reloads).
+        """
+        if listener not in self._listeners:
+            self._listeners.append(listener)
+
+    def remove_listener(self, listener: ScheduleListener):
+        """Unregister a previously added callback."""
+        if listener in self._listeners:
+            self._listeners.remove(listener)
+
+    def _notify(self, event: str, message: Optional[ScheduledMessage] = None):
+        for listener in list(self._listeners):
             try:
-                self._messages = json.loads(SCHEDULED_FILE.read_text())
-            except json.JSONDecodeError:
-                print("Error loading scheduled messages file")
-                self._messages = []
-        else:
-            self._messages = []
+                listener(event, message)
+            except Exception as e:
+                print(f"Error in schedule listener: {e}")
+
+    def use_store(self, store):
+        """Switch to a different storage backend and reload from it."""
+        if store is self._store:
+            return
+        self._store.close()
+        self._store = store
+        self.load_messages()
+
+    def load_messages(self):
+        """Load scheduled messages from storage."""
+        self._set_messages(self._store.load())
+        self._notify("reload")
+
+    def _set_messages(self, messages: List[ScheduledMessage]):
+        self._by_id = {message.id: message for message in messages}
 
     def save_messages(self):
-        """Save messages to file."""
-        SCHEDULED_FILE.write_text(json.dumps(self._messages, indent=2))
+        """Save all messages to storage."""
+        self._store.save(self._by_id.values())
+
+    def get_message(self, message_id: str) -> Optional[ScheduledMessage]:
+        """Get a scheduled message by ID, or None if it is not scheduled."""
+        return self._by_id.get(message_id)
 
-    def add_message(self, message: Dict[str, Any]):
-        """Add a new scheduled message"""
-        self._messages.append(message)
-        self.save_messages()
+    def add_message(self, message: ScheduledMessage) -> ScheduledMessage:
+        """Add a new scheduled message, converting legacy dicts to records"""
+        message = ScheduledMessage.coerce(message)
+        if message.id in self._by_id:
+            raise ValueError(f"Scheduled message {message.id} already exists")
+        self._by_id[message.id] = message
+        self._store.insert(message, self._by_id.values())
+        self._notify("add", message)
+        return message
 
-    def remove_message(self, message: Dict[str, Any]):
-        """Remove a scheduled message"""
-        self._messages.remove(message)
-        self.save_messages()
+    def update_message(
+        self,
+        message_id: str,
+        *,
+        due_at: Optional[float] = None,
+        channel_ids: Optional[List[int]] = None,
+        content: Optional[str] = None
+    ) -> ScheduledMessage:
+        """Change when, where or what a scheduled message will be sent.
+
+        Only the arguments that are given are changed.
+
+        Raises:
+            KeyError: If no message with that ID is scheduled.
+        """
+        message = self._by_id[message_id]
+        if due_at is not None:
+            message.due_at = due_at
+        if channel_ids is not None:
+            message.channel_ids = array("q", channel_ids)
+        if content is not None:
+            message.content = content
+        self._store.update(message, self._by_id.values())
+        self._notify("update", message)
+        return message
+
+    def remove_message(self, message: Union[ScheduledMessage, str]) -> ScheduledMessage:
+        """Remove a scheduled message, given the record or its ID.
+
+        Raises:
+            KeyError: If the message is not scheduled.
+        """
+        message_id = message if isinstance(message, str) else message.id
+        stored = self._by_id.pop(message_id)
+        self._store.delete(stored, self._by_id.values())
+        self._notify("remove", stored)
+        return stored
+
+    def mark_channel_complete(self, message: ScheduledMessage, channel_id: int):
+        """Record that delivery of a message to one channel has finished.
+
+        Completed channels are kept in the message's ``completed_channel_ids``
+        and handed to the store straight away, so a restart only resumes the
+        rest. Messages removed or replaced while they were being delivered
+        are left alone, so the checkpoint cannot bring them back.
+        """
+        if self._by_id.get(message.id) is not message:
+            return
+        message.completed_channel_ids.append(channel_id)
+        self._store.update(message, self._by_id.values())
+
+    def due_messages(self, now: Optional[float] = None) -> List[ScheduledMessage]:
+        """Get messages due at or before ``now`` (epoch seconds), oldest first."""
+        return self._store.due(datetime.now().timestamp() if now is None else now, self._by_id.values())
+
+    def guild_messages(self, guild_id: int) -> List[ScheduledMessage]:
+        """Get the messages scheduled in a guild, oldest first."""
+        return self._store.for_guild(guild_id, self._by_id.values())
+
+    async def flush(self):
+        """Wait for pending storage writes to complete."""
+        await self._store.flush()
 
     @property
-    def messages(self) -> List[Dict[str, Any]]:
+    def messages(self) -> List[ScheduledMessage]:
         """Get all scheduled messages"""
-        return self._messages
+        return list(self._by_id.values())
+
+    def __len__(self) -> int:
+        return len(self._by_id)
 
 schedule_manager = ScheduleManager()
+scheduled_messages_pending.set_function(lambda: len(schedule_manager))
+
+def configure_storage(
+    backend: Optional[str] = None,
+    shard_ids: Optional[Collection[int]] = None,
+    shard_count: Optional[int] = None
+):
+    """Point the shared schedule manager at the configured backend.
+
+    Cluster workers pass their shards to only load their guilds' messages.
+    """
+    schedule_manager.use_store(create_store(backend, shard_ids, shard_count))
 
 def load_scheduled_messages():
     schedule_manager.load_messages()
@@ -54,11 +802,13 @@ def load_scheduled_messages():
 
 def save_scheduled_messages(messages=None):
     if messages is not None:
-        schedule_manager._messages = messages
+        schedule_manager._set_messages([ScheduledMessage.coerce(message) for message in messages])
     schedule_manager.save_messages()
+    if messages is not None:
+        schedule_manager._notify("reload")
 
 def add_scheduled_message(message):
-    schedule_manager.add_message(message)
+    return schedule_manager.add_message(message)
 
 def remove_scheduled_message(message):
     schedule_manager.remove_message(message)
@@ -0,0 +1,205 @@
+"""Lightweight tracing of commands and deliveries."""
+
+import collections
+import contextvars
+import json
+import os
+import queue
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Deque, Dict, Iterator, List, Optional
+
+from .logger import LOGS_DIR, get_logger
+
+logger = get_logger('tracing')
+
+TRACE_FILE = LOGS_DIR / "traces.jsonl"
+DEFAULT_TRACE_BUFFER_SIZE = 200
+
+
+class Span:
+    """One timed operation within a trace."""
+
+    __slots__ = ("name", "trace_id", "span_id", "parent_id", "start", "duration", "attributes", "error", "_spans")
+
+    def __init__(self, name: str, trace_id: str, parent: Optional["Span"], attributes: Dict[str, Any]):
+        self.name = name
+        self.trace_id = trace_id
+        self.span_id = uuid.uuid4().hex[:16]
+        self.parent_id = parent.span_id if parent is not None else None
+        self.start = time.time()
+        self.duration: Optional[float] = None
+        self.attributes = attributes
+        self.error: Optional[str] = None
+        # Finished spans of the whole local tree, shared with the root span
+        self._spans: List["Span"] = parent._spans if parent is not None else []
+
+    def set_attribute(self, key: str, value: Any):
+        self.attributes[key] = value
+
+    def to_dict(self) -> Dict[str, Any]:
+        data = {
+            "name": self.name,
+            "span_id": self.span_id,
+            "parent_id": self.parent_id,
+            "start": self.start,
+            "duration_ms": round(self.duration * 1000, 3) if self.duration is not None else None,
+            "attributes": self.attributes
+        }
+        if self.error:
+            data["error"] = self.error
+        return data
+
+
+class RingBufferExporter:
+    """Keeps the most recent traces in memory."""
+
+    def __init__(self, capacity: int = DEFAULT_TRACE_BUFFER_SIZE):
+        self._traces: Deque[Dict[str, Any]] = collections.deque(maxlen=capacity)
+
+    def export(self, trace: Dict[str, Any]):
+        self._traces.append(trace)
+
+    def recent(self, limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        """Get buffered traces, newest first."""
+        traces = list(reversed(self._traces))
+        return traces[:limit] if limit is not None else traces
+
+    def find(self, trace_id: str) -> List[Dict[str, Any]]:
+        """Get buffered traces whose ID starts with ``trace_id``, oldest first."""
+        return [trace for trace in self._traces if trace["trace_id"].startswith(trace_id)]
+
+
+class JsonLinesExporter:
+    """Appends traces to a JSON-lines file from a background thread."""
+
+    def __init__(self, path: Path = TRACE_FILE):
+        self.path = Path(path)
+        self._queue: "queue.SimpleQueue[Optional[Dict[str, Any]]]" = queue.SimpleQueue()
+        self._thread = threading.Thread(target=self._write_loop, name="trace-writer", daemon=True)
+        self._thread.start()
+
+    def export(self, trace: Dict[str, Any]):
+        self._queue.put(trace)
+
+    def _write_loop(self):
+        with self.path.open("a", encoding="utf-8") as f:
+            while True:
+                trace = self._queue.get()
+                if trace is None:
+                    return
+                f.write(json.dumps(trace) + "\n")
+                if self._queue.empty():
+                    f.flush()
+
+    def close(self):
+        self._queue.put(None)
+        self._thread.join()
+
+
+_current_span: contextvars.ContextVar[Optional[Span]] = contextvars.ContextVar("reverb_span", default=None)
+
+
+class Tracer:
+    """Creates spans and hands finished traces to the exporters.
+
+    A span opened while no span is active starts a local trace; spans
+    opened inside it, including in tasks it starts, become its children.
+    When that root span ends, it and all its finished children are
+    exported as one record. Work that spans several interactions, such as
+    a command followed by its modal, reuses one trace ID by passing it to
+    each root span.
+    """
+
+    def __init__(self):
+        self.exporters: List[Any] = []
+
+    def add_exporter(self, exporter):
+        self.exporters.append(exporter)
+
+    @property
+    def ring_buffer(self) -> Optional[RingBufferExporter]:
+        return next((e for e in self.exporters if isinstance(e, RingBufferExporter)), None)
+
+    @contextmanager
+    def span(self, name: str, trace_id: Optional[str] = None, **attributes) -> Iterator[Optional[Span]]:
+        """Time the ``with`` block as a span.
+
+        Args:
+            name: What the span measures.
+            trace_id: Trace to join when this starts a new local trace.
+            **attributes: Extra values recorded on the span.
+        """
+        if not self.exporters:
+            yield None
+            return
+        parent = _current_span.get()
+        if parent is not None:
+            trace_id = parent.trace_id
+        current = Span(name, trace_id or uuid.uuid4().hex, parent, attributes)
+        token = _current_span.set(current)
+        start = time.perf_counter()
+        try:
+            yield current
+        except BaseException as e:
+            current.error = f"{type(e).__name__}: {e}"
+            raise
+        finally:
+            current.duration = time.perf_counter() - start
+            _current_span.reset(token)
+            current._spans.append(current)
+            if parent is None:
+                self._export(current)
+
+    def _export(self, root: Span):
+        trace = {
+            "trace_id": root.trace_id,
+            "name": root.name,
+            "start": root.start,
+            "duration_ms": round(root.duration * 1000, 3),
+            "spans": [span.to_dict() for span in root._spans]
+        }
+        for exporter in self.exporters:
+            try:
+                exporter.export(trace)
+            except Exception as e:
+                logger.error(f"Error exporting trace {root.trace_id}: {e}")
+
+
+def current_trace_id() -> Optional[str]:
+    """The trace ID of the active span, if any."""
+    span = _current_span.get()
+    return span.trace_id if span is not None else None
+
+
+tracer = Tracer()
+span = tracer.span
+
+
+def configure_tracing(trace_file: Path = TRACE_FILE):
+    """Set up the exporters named by ``TRACE_EXPORTERS``.
+
+    A comma-separated list of ``memory`` (ring buffer of ``TRACE_BUFFER_SIZE``
+    traces, the default) and ``jsonl`` (``trace_file``, by default
+    ``logs/traces.jsonl``); ``none`` disables tracing.
+    """
+    tracer.exporters = []
+    names = [name.strip().lower() for name in os.getenv('TRACE_EXPORTERS', 'memory').split(",")]
+    for name in names:
+        if name == 'memory':
+            tracer.add_exporter(RingBufferExporter(int(os.getenv('TRACE_BUFFER_SIZE', DEFAULT_TRACE_BUFFER_SIZE))))
+        elif name == 'jsonl':
+            tracer.add_exporter(JsonLinesExporter(trace_file))
+        elif name not in ('none', ''):
+            logger.warning(f"Unknown trace exporter: {name}")
+
+
+def shutdown_tracing():
+    """Write out queued traces and stop the exporters."""
+    for exporter in tracer.exporters:
+        if hasattr(exporter, "close"):
+            exporter.close()
+    tracer.exporters = []